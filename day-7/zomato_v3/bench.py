@@ -0,0 +1,216 @@
+"""
+Serialization benchmark for the v3 response models.
+
+Run from the directory containing the `zomato_v3` package, e.g.:
+
+    python -m zomato_v3.bench --order-items 10 --menu-items 50
+
+Builds ORM object graphs in memory (no database involved) and times what
+FastAPI does for a `response_model` route: validate the ORM object through
+the model's TypeAdapter (`from_attributes`), then dump it straight to JSON
+bytes. Order payloads are also timed against a reference copy of the
+schema that still validates emails with `EmailStr`. The `routes` section
+times the order routes' own serialization paths against the ones they
+replaced: order placement validating in the route and again through
+`response_model`, and the status update validating against its Union
+`response_model`. Prints a JSON report of microseconds per payload.
+"""
+
+import argparse
+import json
+import time
+from datetime import datetime
+from typing import List, Optional, Union
+
+from pydantic import EmailStr, TypeAdapter
+
+from . import models, schemas
+from .routes import orders as order_routes
+
+
+class _EmailStrCustomer(schemas.SimpleCustomer):
+    email: EmailStr
+
+
+class _EmailStrReview(schemas.Review):
+    customer: _EmailStrCustomer
+
+
+class _EmailStrOrder(schemas.Order):
+    customer: _EmailStrCustomer
+    review: Optional[_EmailStrReview] = None
+
+
+def build_restaurant(menu_items: int):
+    restaurant = models.Restaurant(
+        id=1,
+        name="Benchmark Bistro",
+        location="Bengaluru",
+        cuisine="North Indian",
+        rating=4.3,
+        created_at=datetime(2024, 1, 1, 12, 0),
+    )
+    restaurant.menu_items = [
+        models.MenuItem(
+            id=i,
+            restaurant_id=1,
+            name=f"Dish {i}",
+            description="House special",
+            price=249.0,
+            is_available=True,
+        )
+        for i in range(1, menu_items + 1)
+    ]
+    return restaurant
+
+
+def build_order(order_id: int, restaurant, order_items: int):
+    customer = models.Customer(
+        id=1,
+        name="Asha Rao",
+        email="asha.rao@example.com",
+        phone_number="+91 98450 00000",
+        address="12 MG Road",
+        is_active=True,
+        created_at=datetime(2024, 1, 1, 12, 0),
+    )
+    menu = restaurant.menu_items
+    order = models.Order(
+        id=order_id,
+        customer_id=1,
+        restaurant_id=restaurant.id,
+        order_status=models.OrderStatus.delivered,
+        total_amount=249.0 * order_items,
+        delivery_address=customer.address,
+        order_date=datetime(2024, 1, 2, 19, 30),
+        customer=customer,
+        restaurant=restaurant,
+    )
+    order.items = [
+        models.OrderItem(
+            id=i,
+            order_id=order_id,
+            menu_item_id=menu[i % len(menu)].id,
+            menu_item=menu[i % len(menu)],
+            quantity=1,
+            item_price=249.0,
+        )
+        for i in range(order_items)
+    ]
+    order.review = models.Review(
+        id=order_id,
+        order_id=order_id,
+        customer_id=1,
+        restaurant_id=restaurant.id,
+        rating=5,
+        comment="Great",
+        created_at=datetime(2024, 1, 3, 9, 0),
+        customer=customer,
+    )
+    return order
+
+
+def time_payload(adapter: TypeAdapter, payload, rounds: int):
+    """Microseconds per validate, per dump_json, and per round trip."""
+    start = time.perf_counter()
+    for _ in range(rounds):
+        value = adapter.validate_python(payload, from_attributes=True)
+    validated = time.perf_counter()
+    for _ in range(rounds):
+        adapter.dump_json(value)
+    dumped = time.perf_counter()
+    return {
+        "validate_us": round((validated - start) / rounds * 1e6, 1),
+        "dump_json_us": round((dumped - validated) / rounds * 1e6, 1),
+        "total_us": round((dumped - start) / rounds * 1e6, 1),
+        "bytes": len(adapter.dump_json(value)),
+    }
+
+
+def time_call(render, rounds: int) -> float:
+    """Microseconds per call of `render`, after one untimed warm-up call."""
+    render()
+    start = time.perf_counter()
+    for _ in range(rounds):
+        render()
+    return round((time.perf_counter() - start) / rounds * 1e6, 1)
+
+
+def route_report(order, rounds: int) -> dict:
+    order_adapter = TypeAdapter(schemas.Order)
+    union_adapter = TypeAdapter(Union[schemas.Order, schemas.OrderStatusChange])
+
+    def response_model(adapter, value):
+        # What FastAPI does with a route's return value and its response_model
+        return adapter.dump_json(adapter.validate_python(value, from_attributes=True))
+
+    def prevalidated_order():
+        value = schemas.Order.model_validate(order, from_attributes=True)
+        return response_model(order_adapter, value)
+
+    return {
+        "order_placement": {
+            "response_model_us": time_call(
+                lambda: response_model(order_adapter, order), rounds
+            ),
+            "prevalidated_reference_us": time_call(prevalidated_order, rounds),
+        },
+        "order_status_update": {
+            "adapter_us": time_call(
+                lambda: order_routes._json_response(order_routes._ORDER_ADAPTER, order),
+                rounds,
+            ),
+            "union_reference_us": time_call(
+                lambda: response_model(union_adapter, order), rounds
+            ),
+        },
+    }
+
+
+def run(args):
+    restaurant = build_restaurant(args.menu_items)
+    order = build_order(1, restaurant, args.order_items)
+    history = [
+        build_order(i, restaurant, args.order_items) for i in range(1, args.orders + 1)
+    ]
+    cached_detail = schemas.Restaurant.model_validate(restaurant, from_attributes=True)
+
+    payloads = {
+        "order": (schemas.Order, _EmailStrOrder, order),
+        "order_history": (List[schemas.Order], List[_EmailStrOrder], history),
+        "restaurant_detail": (schemas.Restaurant, None, restaurant),
+        "restaurant_detail_cached": (schemas.Restaurant, None, cached_detail),
+        "restaurant_list": (
+            List[schemas.SimpleRestaurant],
+            None,
+            [restaurant] * args.orders,
+        ),
+    }
+
+    report = {}
+    for name, (model, reference_model, payload) in payloads.items():
+        rounds = max(
+            1, args.rounds // (len(payload) if isinstance(payload, list) else 1)
+        )
+        result = {"rounds": rounds, **time_payload(TypeAdapter(model), payload, rounds)}
+        if reference_model is not None:
+            reference = time_payload(TypeAdapter(reference_model), payload, rounds)
+            result["emailstr_reference_total_us"] = reference["total_us"]
+        report[name] = result
+    report["routes"] = route_report(order, args.rounds)
+    print(json.dumps(report, indent=2))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--order-items", type=int, default=10)
+    parser.add_argument("--menu-items", type=int, default=50)
+    parser.add_argument(
+        "--orders", type=int, default=50, help="orders per history/list payload"
+    )
+    parser.add_argument("--rounds", type=int, default=2000)
+    run(parser.parse_args())
+
+
+if __name__ == "__main__":
+    main()
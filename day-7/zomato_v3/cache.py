@@ -0,0 +1,113 @@
+"""
+In-process read-through cache for hot, rarely changing records.
+
+Entries hold already-serialized response schemas, so a hit skips both the
+database and ORM-to-schema conversion. The cache is per process: writes
+made through crud invalidate it explicitly, and the TTL bounds staleness
+for changes made elsewhere (other workers, maintenance commands).
+
+A read-through fill awaits the database between its miss and its `set`,
+and an invalidation can land in that gap; storing the value it read then
+would cache stale data until the TTL runs out. Readers take a
+`generation(key)` before reading and pass it to `set`, which skips the
+store if the key was invalidated (or the cache cleared) since.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+
+class LRUCache:
+    """A thread-safe, size-bounded LRU cache with a per-entry TTL."""
+
+    def __init__(self, name: str, maxsize: int = 1024, ttl: float = 300.0):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()  # key -> (expires_at, value)
+        # key -> invalidation count, for keys invalidated since the last
+        # clear(); clear() bumps the epoch instead of every key
+        self._generations = {}
+        self._epoch = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """Returns the cached value, or None on a miss or expired entry."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return None
+
+    def generation(self, key) -> tuple:
+        """A token for `set` that goes stale when `key` is invalidated."""
+        with self._lock:
+            return (self._epoch, self._generations.get(key, 0))
+
+    def set(self, key, value, generation: Optional[tuple] = None):
+        """
+        Stores `value`, unless `generation` is given and `key` has been
+        invalidated since it was taken. Returns whether it was stored.
+        """
+        with self._lock:
+            if generation is not None and generation != (
+                self._epoch,
+                self._generations.get(key, 0),
+            ):
+                return False
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+            return True
+
+    def invalidate(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+            self._generations[key] = self._generations.get(key, 0) + 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._generations.clear()
+            self._epoch += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+CACHE_SIZE = int(os.getenv("ZOMATO_CACHE_SIZE", "1024"))
+CACHE_TTL = float(os.getenv("ZOMATO_CACHE_TTL", "300"))
+
+# Restaurant detail (including its menu) keyed by restaurant id
+restaurant_cache = LRUCache("restaurants", maxsize=CACHE_SIZE, ttl=CACHE_TTL)
+# Menu item records keyed by menu item id
+menu_item_cache = LRUCache("menu_items", maxsize=CACHE_SIZE * 4, ttl=CACHE_TTL)
+# `schemas.CustomerAnalytics` keyed by customer id; dropped whenever the
+# customer places an order or one of their orders changes status
+customer_analytics_cache = LRUCache(
+    "customer_analytics", maxsize=CACHE_SIZE * 4, ttl=CACHE_TTL
+)
+
+CACHES = (restaurant_cache, menu_item_cache, customer_analytics_cache)
@@ -0,0 +1,67 @@
+"""
+ETag / conditional GET helpers.
+
+Restaurants, menu items and orders carry a `version` counter that is bumped
+by every write that changes what their GET endpoints return. The ETag is
+built from those counters alone, so a client's `If-None-Match` can be
+answered with a 304 before the payload is loaded or serialized.
+"""
+
+from typing import Any, NamedTuple, Optional
+
+from fastapi import Request, Response
+
+# Cache-Control for representations that may change: clients may store them
+# but must revalidate (cheaply, via the ETag) before reuse.
+REVALIDATE = "no-cache"
+PRIVATE_REVALIDATE = "private, no-cache"
+# Delivered and cancelled orders no longer change status, items or totals,
+# but a review may still be added and the nested restaurant rating still
+# moves. Clients may reuse them for a few minutes without asking, then must
+# revalidate with the ETag like any other order.
+TERMINAL_ORDER = "private, max-age=300, must-revalidate"
+
+
+class Versioned(NamedTuple):
+    """A cached response payload together with the version it was built at."""
+
+    version: Any
+    payload: Any
+
+
+def make_etag(*parts) -> str:
+    """A strong ETag from the resource's identity and version counters."""
+    return '"' + "-".join(str(part) for part in parts) + '"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """
+    Whether the request's If-None-Match covers `etag`. Uses the weak
+    comparison RFC 9110 prescribes for If-None-Match, so a `W/` prefix
+    added by an intermediary still matches.
+    """
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def not_modified(etag: str, cache_control: Optional[str] = None) -> Response:
+    headers = {"ETag": etag}
+    if cache_control:
+        headers["Cache-Control"] = cache_control
+    return Response(status_code=304, headers=headers)
+
+
+def set_validators(response: Response, etag: str, cache_control: Optional[str] = None):
+    response.headers["ETag"] = etag
+    if cache_control:
+        response.headers["Cache-Control"] = cache_control
@@ -1,215 +1,905 @@
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import func, desc
-from . import models, schemas
-from typing import List, Optional
-from datetime import date
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, selectinload
+from sqlalchemy import select, update, func, desc, case, cast, Float, literal_column
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from . import cache, events, models, schemas
+from .conditional import Versioned
+from .pagination import Page, paginate
+from typing import Dict, List, Optional, Sequence
+from datetime import date, datetime, timedelta, timezone
+import re
+
+# Loader options for everything `schemas.Order` serializes. With AsyncSession
+# nothing can be lazily loaded, so every query returning orders uses these.
+ORDER_GRAPH_OPTIONS = (
+    selectinload(models.Order.items).joinedload(models.OrderItem.menu_item),
+    joinedload(models.Order.customer),
+    joinedload(models.Order.restaurant),
+    joinedload(models.Order.review).joinedload(models.Review.customer),
+)
 
 
 # Restaurant CRUD
-def get_restaurant(db: Session, restaurant_id: int):
-    return (
-        db.query(models.Restaurant)
-        .options(joinedload(models.Restaurant.menu_items))
+async def get_restaurant(db: AsyncSession, restaurant_id: int):
+    """Loads a restaurant with its full menu; use for the detail view only."""
+    result = await db.execute(
+        select(models.Restaurant)
+        .options(selectinload(models.Restaurant.menu_items))
         .filter(models.Restaurant.id == restaurant_id)
-        .first()
     )
+    return result.scalars().first()
+
+
+async def get_restaurant_detail(db: AsyncSession, restaurant_id: int):
+    """
+    Read-through cached restaurant detail (with menu) as a
+    `Versioned(version, schemas.Restaurant)`, or None if the restaurant
+    doesn't exist.
+    """
+    generation = cache.restaurant_cache.generation(restaurant_id)
+    cached = cache.restaurant_cache.get(restaurant_id)
+    if cached is None:
+        db_restaurant = await get_restaurant(db, restaurant_id)
+        if db_restaurant is None:
+            return None
+        cached = Versioned(
+            db_restaurant.version,
+            schemas.Restaurant.model_validate(db_restaurant, from_attributes=True),
+        )
+        cache.restaurant_cache.set(restaurant_id, cached, generation)
+    return cached
+
+
+async def get_restaurant_detail_version(db: AsyncSession, restaurant_id: int):
+    """
+    The version `get_restaurant_detail` would return, without building the
+    payload: from the cache if present, else a primary-key lookup.
+    """
+    return await _cached_version(
+        db, cache.restaurant_cache, models.Restaurant, restaurant_id
+    )
+
+
+async def _cached_version(db: AsyncSession, lru, model, row_id: int):
+    cached = lru.get(row_id)
+    if cached is not None:
+        return cached.version
+    return await db.scalar(select(model.version).where(model.id == row_id))
+
+
+async def _bump_version(db: AsyncSession, model, row_id: int):
+    await db.execute(
+        update(model)
+        .where(model.id == row_id)
+        .values({model.version: model.version + 1})
+        .execution_options(synchronize_session=False)
+    )
+
 
+async def get_restaurant_summary(db: AsyncSession, restaurant_id: int):
+    """Loads just the restaurant row (relationships stay unloaded)."""
+    return await db.get(models.Restaurant, restaurant_id)
 
-def get_restaurants(
-    db: Session,
+
+async def get_restaurants(
+    db: AsyncSession,
     skip: int = 0,
     limit: int = 100,
     cuisine: Optional[str] = None,
     min_rating: Optional[float] = None,
-):
-    query = db.query(models.Restaurant)
+    cursor: Optional[str] = None,
+) -> Page:
+    stmt = select(models.Restaurant).options(selectinload(models.Restaurant.menu_items))
     if cuisine:
-        query = query.filter(models.Restaurant.cuisine.ilike(f"%{cuisine}%"))
+        # Word-prefix match through the FTS index instead of a leading-%
+        # LIKE, which can't use an index and scans the whole table
+        stmt = stmt.filter(
+            models.Restaurant.id.in_(
+                select(models.restaurants_fts.c.rowid).where(
+                    _fts_match("restaurants_fts", cuisine, columns=("cuisine",))
+                )
+            )
+        )
     if min_rating:
-        query = query.filter(models.Restaurant.rating >= min_rating)
-    return query.offset(skip).limit(limit).all()
+        stmt = stmt.filter(models.Restaurant.rating >= min_rating)
+    return await paginate(
+        db,
+        stmt,
+        (models.Restaurant.name, models.Restaurant.id),
+        limit,
+        skip=skip,
+        cursor=cursor,
+    )
 
 
-def create_restaurant(db: Session, restaurant: schemas.RestaurantCreate):
-    db_restaurant = models.Restaurant(**restaurant.dict())
+async def create_restaurant(db: AsyncSession, restaurant: schemas.RestaurantCreate):
+    db_restaurant = models.Restaurant(**restaurant.model_dump(), menu_items=[])
     db.add(db_restaurant)
-    db.commit()
-    db.refresh(db_restaurant)
+    await db.commit()
     return db_restaurant
 
 
+# Full-text search
+def _fts_match(fts_table: str, text: str, columns: Sequence[str] = ()):
+    """
+    Builds a `<fts_table> MATCH ...` clause from free text: every word must
+    match, and each word also matches as a prefix ("pizz" finds "Pizzeria").
+    Words are quoted so user input can't inject FTS5 query syntax. Raises
+    ValueError if the text has no searchable words.
+    """
+    terms = re.findall(r"\w+", text)
+    if not terms:
+        raise ValueError("Search text must contain at least one letter or digit.")
+    query = " ".join(f'"{term}"*' for term in terms)
+    if columns:
+        query = "{%s} : (%s)" % (" ".join(columns), query)
+    return literal_column(fts_table).op("MATCH")(query)
+
+
+async def search_restaurants(db: AsyncSession, q: str, limit: int = 10):
+    """Restaurants matching `q` in name, cuisine or location, best first."""
+    # bm25 weights: a hit on the name counts most, location least
+    rank = func.bm25(literal_column("restaurants_fts"), 10.0, 5.0, 1.0)
+    result = await db.execute(
+        select(models.Restaurant)
+        .join(
+            models.restaurants_fts,
+            models.restaurants_fts.c.rowid == models.Restaurant.id,
+        )
+        .where(_fts_match("restaurants_fts", q))
+        .order_by(rank)
+        .limit(limit)
+    )
+    return result.scalars().all()
+
+
+async def search_menu_items(db: AsyncSession, q: str, limit: int = 10):
+    """Menu items matching `q` in name or description, best first."""
+    rank = func.bm25(literal_column("menu_items_fts"), 10.0, 1.0)
+    result = await db.execute(
+        select(models.MenuItem)
+        .join(
+            models.menu_items_fts,
+            models.menu_items_fts.c.rowid == models.MenuItem.id,
+        )
+        .where(_fts_match("menu_items_fts", q))
+        .order_by(rank)
+        .limit(limit)
+    )
+    return result.scalars().all()
+
+
 # Menu Item CRUD
-def create_restaurant_menu_item(
-    db: Session, item: schemas.MenuItemCreate, restaurant_id: int
+async def create_restaurant_menu_item(
+    db: AsyncSession, item: schemas.MenuItemCreate, restaurant_id: int
 ):
-    db_item = models.MenuItem(**item.dict(), restaurant_id=restaurant_id)
+    db_item = models.MenuItem(**item.model_dump(), restaurant_id=restaurant_id)
     db.add(db_item)
-    db.commit()
-    db.refresh(db_item)
+    await _bump_version(db, models.Restaurant, restaurant_id)
+    await db.commit()
+    cache.restaurant_cache.invalidate(restaurant_id)
     return db_item
 
 
 # Customer CRUD
-def get_customer(db: Session, customer_id: int):
-    return db.query(models.Customer).filter(models.Customer.id == customer_id).first()
-
-
-def get_customer_by_email(db: Session, email: str):
-    return db.query(models.Customer).filter(models.Customer.email == email).first()
+async def get_customer(db: AsyncSession, customer_id: int):
+    return await db.get(models.Customer, customer_id)
 
 
-def get_customers(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(models.Customer).offset(skip).limit(limit).all()
+async def get_customer_by_email(db: AsyncSession, email: str):
+    result = await db.execute(
+        select(models.Customer).filter(models.Customer.email == email)
+    )
+    return result.scalars().first()
+
+
+async def get_customers(
+    db: AsyncSession, skip: int = 0, limit: int = 100, cursor: Optional[str] = None
+) -> Page:
+    return await paginate(
+        db,
+        select(models.Customer),
+        (models.Customer.id,),
+        limit,
+        skip=skip,
+        cursor=cursor,
+    )
 
 
-def create_customer(db: Session, customer: schemas.CustomerCreate):
-    db_customer = models.Customer(**customer.dict())
+async def create_customer(db: AsyncSession, customer: schemas.CustomerCreate):
+    db_customer = models.Customer(**customer.model_dump())
     db.add(db_customer)
-    db.commit()
-    db.refresh(db_customer)
+    await db.commit()
     return db_customer
 
 
 # Order CRUD
-def get_order(db: Session, order_id: int):
-    return (
-        db.query(models.Order)
-        .options(
-            joinedload(models.Order.items).joinedload(models.OrderItem.menu_item),
-            joinedload(models.Order.customer),
-            joinedload(models.Order.restaurant),
-            joinedload(models.Order.review).joinedload(models.Review.customer),
-        )
+async def get_order(db: AsyncSession, order_id: int):
+    result = await db.execute(
+        select(models.Order)
+        .options(*ORDER_GRAPH_OPTIONS)
         .filter(models.Order.id == order_id)
-        .first()
     )
+    return result.scalars().first()
+
+
+async def get_order_versions(db: AsyncSession, order_id: int):
+    """
+    `(version, order_status, restaurant_version)` for an order, or None.
+    The order payload nests its restaurant and that restaurant's menu
+    items, whose changes all bump the restaurant's version.
+    """
+    result = await db.execute(
+        select(
+            models.Order.version,
+            models.Order.order_status,
+            models.Restaurant.version.label("restaurant_version"),
+        )
+        .join(models.Restaurant, models.Restaurant.id == models.Order.restaurant_id)
+        .where(models.Order.id == order_id)
+    )
+    return result.first()
 
 
-def get_customer_orders(db: Session, customer_id: int):
-    return db.query(models.Order).filter(models.Order.customer_id == customer_id).all()
+async def get_customer_orders(
+    db: AsyncSession, customer_id: int, skip: int = 0, limit: int = 50
+):
+    """
+    One page of a customer's orders, newest first, with the full order graph
+    batch-loaded: the query count is the same for 3 orders or 3,000.
+    """
+    result = await db.execute(
+        select(models.Order)
+        .options(*ORDER_GRAPH_OPTIONS)
+        .filter(models.Order.customer_id == customer_id)
+        .order_by(desc(models.Order.order_date), desc(models.Order.id))
+        .offset(skip)
+        .limit(limit)
+    )
+    return result.scalars().all()
 
 
-def get_restaurant_orders(
-    db: Session,
+def _filter_restaurant_orders(
+    stmt,
     restaurant_id: int,
     status: Optional[schemas.OrderStatus] = None,
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
 ):
-    query = db.query(models.Order).filter(models.Order.restaurant_id == restaurant_id)
+    stmt = stmt.filter(models.Order.restaurant_id == restaurant_id)
     if status:
-        query = query.filter(models.Order.order_status == status)
+        stmt = stmt.filter(models.Order.order_status == status)
     if start_date:
-        query = query.filter(models.Order.order_date >= start_date)
+        stmt = stmt.filter(models.Order.order_date >= start_date)
     if end_date:
-        query = query.filter(models.Order.order_date <= end_date)
-    return query.order_by(desc(models.Order.order_date)).all()
+        stmt = stmt.filter(models.Order.order_date <= end_date)
+    return stmt.order_by(desc(models.Order.order_date), desc(models.Order.id))
+
+
+async def get_restaurant_orders(
+    db: AsyncSession,
+    restaurant_id: int,
+    status: Optional[schemas.OrderStatus] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+):
+    stmt = _filter_restaurant_orders(
+        select(models.Order).options(*ORDER_GRAPH_OPTIONS),
+        restaurant_id,
+        status,
+        start_date,
+        end_date,
+    )
+    result = await db.execute(stmt)
+    return result.scalars().all()
+
+
+async def stream_restaurant_orders(
+    db: AsyncSession,
+    restaurant_id: int,
+    status: Optional[schemas.OrderStatus] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    batch_size: int = 1000,
+):
+    """
+    Yields a restaurant's orders, newest first, as flat row mappings read
+    through a server-side cursor `batch_size` rows at a time. Rows are plain
+    columns rather than ORM objects, so nothing piles up in the session and
+    memory stays bounded however many orders there are.
+    """
+    item_count = (
+        select(func.coalesce(func.sum(models.OrderItem.quantity), 0))
+        .where(models.OrderItem.order_id == models.Order.id)
+        .scalar_subquery()
+    )
+    stmt = _filter_restaurant_orders(
+        select(
+            models.Order.id,
+            models.Order.order_date,
+            models.Order.order_status,
+            models.Order.customer_id,
+            models.Customer.name.label("customer_name"),
+            models.Order.total_amount,
+            item_count.label("item_count"),
+            models.Order.delivery_address,
+            models.Order.special_instructions,
+            models.Order.delivery_time,
+        ).join(models.Customer, models.Customer.id == models.Order.customer_id),
+        restaurant_id,
+        status,
+        start_date,
+        end_date,
+    )
+    result = await db.stream(stmt.execution_options(yield_per=batch_size))
+    async for row in result.mappings():
+        yield row
+
+
+# What a status transition returns; also everything the rollups need
+ORDER_STATUS_CHANGE_COLUMNS = (
+    models.Order.id,
+    models.Order.order_status,
+    models.Order.previous_status,
+    models.Order.version,
+    models.Order.customer_id,
+    models.Order.restaurant_id,
+    models.Order.total_amount,
+    models.Order.order_date,
+)
+
+
+async def get_order_status(db: AsyncSession, order_id: int):
+    """The order's `ORDER_STATUS_CHANGE_COLUMNS` row, or None."""
+    result = await db.execute(
+        select(*ORDER_STATUS_CHANGE_COLUMNS).where(models.Order.id == order_id)
+    )
+    return result.first()
+
+
+async def update_order_status(
+    db: AsyncSession, order_id: int, status: schemas.OrderStatus
+):
+    """
+    Moves an order to `status` with a single conditional UPDATE that only
+    matches while the order is in one of the status's allowed predecessors
+    (models.ORDER_STATUS_PREDECESSORS), so concurrent updates can't skip
+    the state machine. The old status comes back through RETURNING (the
+    UPDATE copies it to previous_status) for the rollups.
+
+    Returns the `ORDER_STATUS_CHANGE_COLUMNS` row, or None if the order
+    doesn't exist. Setting the status an order already has is a no-op.
+    Raises ValueError if the transition isn't allowed.
+    """
+    result = await db.execute(
+        update(models.Order)
+        .where(
+            models.Order.id == order_id,
+            models.Order.order_status.in_(models.ORDER_STATUS_PREDECESSORS[status]),
+        )
+        .values(
+            {
+                models.Order.previous_status: models.Order.order_status,
+                models.Order.order_status: status,
+                models.Order.version: models.Order.version + 1,
+            }
+        )
+        .returning(*ORDER_STATUS_CHANGE_COLUMNS)
+        .execution_options(synchronize_session=False)
+    )
+    change = result.first()
+    if change is None:
+        # Nothing matched: find out whether the order exists and why
+        current = await get_order_status(db, order_id)
+        if current is None or current.order_status == status:
+            return current
+        raise ValueError(
+            f"Cannot change order status from {current.order_status.value} "
+            f"to {status.value}."
+        )
+
+    await _record_status_change(db, change, change.previous_status, status)
+    await db.commit()
+    cache.customer_analytics_cache.invalidate(change.customer_id)
+    events.publish_order("order_status", change)
+    return change
+
+
+# Analytics rollups
+async def _upsert_counters(db: AsyncSession, model, key: dict, deltas: dict):
+    """
+    Adds `deltas` ({column: amount}) to the rollup row of `model` with the
+    primary key `key` ({column: value}), creating the row first if needed.
+    """
+    table = model.__table__
+    stmt = sqlite_insert(table).values(**key, **deltas)
+    await db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[table.c[name] for name in key],
+            set_={name: table.c[name] + amount for name, amount in deltas.items()},
+        )
+    )
+
+
+async def _upsert_restaurant_stats(db: AsyncSession, restaurant_id: int, deltas: dict):
+    """
+    Adds `deltas` ({column: amount}) to a restaurant's stats row, creating
+    the row first if the restaurant has none yet.
+    """
+    await _upsert_counters(
+        db, models.RestaurantStats, {"restaurant_id": restaurant_id}, deltas
+    )
+
 
+async def _upsert_time_buckets(
+    db: AsyncSession, restaurant_id: int, placed_at: datetime, deltas: dict
+):
+    """Adds `deltas` to the day and hour buckets an order placed at `placed_at` falls in."""
+    day_key = {"restaurant_id": restaurant_id, "day": placed_at.date()}
+    await _upsert_counters(db, models.RestaurantDailyStats, day_key, deltas)
+    await _upsert_counters(
+        db,
+        models.RestaurantHourlyStats,
+        {**day_key, "hour": placed_at.hour},
+        deltas,
+    )
+
+
+async def record_order_placed(
+    db: AsyncSession,
+    restaurant_id: int,
+    item_quantities: Dict[int, int],
+    placed_at: datetime,
+):
+    """
+    Folds a newly placed order into the restaurant's rollups: one more order
+    in the `placed` state, one more in the current day and hour buckets,
+    plus the quantity sold of each menu item, overall and for the day.
+    Runs in the caller's transaction.
+    """
+    await _upsert_restaurant_stats(
+        db,
+        restaurant_id,
+        {
+            "total_orders": 1,
+            models.RestaurantStats.status_column(models.OrderStatus.placed).key: 1,
+        },
+    )
+    await _upsert_time_buckets(db, restaurant_id, placed_at, {"total_orders": 1})
+    table = models.RestaurantItemStats.__table__
+    stmt = sqlite_insert(table)
+    await db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[table.c.menu_item_id],
+            set_={"quantity_sold": table.c.quantity_sold + stmt.excluded.quantity_sold},
+        ),
+        [
+            {
+                "menu_item_id": menu_item_id,
+                "restaurant_id": restaurant_id,
+                "quantity_sold": quantity,
+            }
+            for menu_item_id, quantity in item_quantities.items()
+        ],
+    )
+    table = models.RestaurantItemDailyStats.__table__
+    stmt = sqlite_insert(table)
+    await db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[table.c.menu_item_id, table.c.day],
+            set_={"quantity_sold": table.c.quantity_sold + stmt.excluded.quantity_sold},
+        ),
+        [
+            {
+                "menu_item_id": menu_item_id,
+                "day": placed_at.date(),
+                "restaurant_id": restaurant_id,
+                "quantity_sold": quantity,
+            }
+            for menu_item_id, quantity in item_quantities.items()
+        ],
+    )
+
+
+async def _record_status_change(
+    db: AsyncSession,
+    db_order,
+    old_status: models.OrderStatus,
+    new_status: models.OrderStatus,
+):
+    """
+    Moves an order between status counters and tracks delivered revenue.
+    `db_order` is anything with the order's restaurant_id, total_amount and
+    order_date (an Order or a row of those columns).
+    """
+    deltas = {
+        models.RestaurantStats.status_column(old_status).key: -1,
+        models.RestaurantStats.status_column(new_status).key: 1,
+    }
+    if new_status == models.OrderStatus.delivered:
+        deltas["delivered_revenue"] = db_order.total_amount
+    elif old_status == models.OrderStatus.delivered:
+        deltas["delivered_revenue"] = -db_order.total_amount
+    await _upsert_restaurant_stats(db, db_order.restaurant_id, deltas)
+
+    # The time buckets only track the delivered and cancelled outcomes
+    bucket_deltas = {}
+    for status, sign in ((old_status, -1), (new_status, 1)):
+        if status == models.OrderStatus.delivered:
+            bucket_deltas["delivered_orders"] = sign
+            bucket_deltas["delivered_revenue"] = sign * db_order.total_amount
+        elif status == models.OrderStatus.cancelled:
+            bucket_deltas["cancelled_orders"] = sign
+    if bucket_deltas:
+        await _upsert_time_buckets(
+            db, db_order.restaurant_id, db_order.order_date, bucket_deltas
+        )
+
+
+async def get_restaurant_stats(db: AsyncSession, restaurant_id: int):
+    """
+    Returns (restaurant rating, stats row) for a restaurant in one
+    primary-key read, or None if the restaurant doesn't exist. The stats row
+    is None for restaurants that have never received an order.
+    """
+    result = await db.execute(
+        select(models.Restaurant.rating, models.RestaurantStats)
+        .outerjoin(
+            models.RestaurantStats,
+            models.RestaurantStats.restaurant_id == models.Restaurant.id,
+        )
+        .filter(models.Restaurant.id == restaurant_id)
+    )
+    return result.first()
+
+
+async def get_restaurant_time_buckets(
+    db: AsyncSession,
+    restaurant_id: int,
+    granularity: schemas.TimeSeriesGranularity,
+    start: date,
+    end: date,
+):
+    """The restaurant's day (or hour) bucket rows from `start` to `end` inclusive."""
+    if granularity == schemas.TimeSeriesGranularity.hour:
+        model, order_by = models.RestaurantHourlyStats, (
+            models.RestaurantHourlyStats.day,
+            models.RestaurantHourlyStats.hour,
+        )
+    else:
+        model, order_by = models.RestaurantDailyStats, (
+            models.RestaurantDailyStats.day,
+        )
+    result = await db.scalars(
+        select(model)
+        .where(model.restaurant_id == restaurant_id, model.day.between(start, end))
+        .order_by(*order_by)
+    )
+    return result.all()
+
+
+async def get_customer_restaurant_totals(
+    db: AsyncSession, first_customer_id: int, last_customer_id: int
+):
+    """
+    `(customer_id, Restaurant, order_count, delivered_spend)` for every
+    restaurant each customer in the id range has ordered from, in one
+    grouped query over orders joined to restaurants.
+    """
+    delivered_spend = func.coalesce(
+        func.sum(
+            case(
+                (
+                    models.Order.order_status == models.OrderStatus.delivered,
+                    models.Order.total_amount,
+                )
+            )
+        ),
+        0.0,
+    )
+    result = await db.execute(
+        select(
+            models.Order.customer_id,
+            models.Restaurant,
+            func.count(models.Order.id),
+            delivered_spend,
+        )
+        .join(models.Restaurant, models.Restaurant.id == models.Order.restaurant_id)
+        .where(models.Order.customer_id.between(first_customer_id, last_customer_id))
+        .group_by(models.Order.customer_id, models.Restaurant.id)
+    )
+    return result.all()
 
-def update_order_status(db: Session, order_id: int, status: schemas.OrderStatus):
-    db_order = get_order(db, order_id=order_id)
-    if db_order:
-        db_order.order_status = status
-        db.commit()
-        db.refresh(db_order)
-    return db_order
+
+async def get_customer_ids(db: AsyncSession, after_id: int = 0, limit: int = 1000):
+    result = await db.scalars(
+        select(models.Customer.id)
+        .where(models.Customer.id > after_id)
+        .order_by(models.Customer.id)
+        .limit(limit)
+    )
+    return result.all()
+
+
+async def get_popular_menu_items(
+    db: AsyncSession,
+    restaurant_id: int,
+    limit: int = 5,
+    days: Optional[int] = None,
+):
+    """
+    The restaurant's `limit` best-selling menu items as
+    `(menu_item_id, name, quantity_sold)` rows, read from the sold-quantity
+    counters: all-time, or over the last `days` UTC days (today included).
+    """
+    if days is None:
+        stats = models.RestaurantItemStats
+        quantity_sold = stats.quantity_sold.label("quantity_sold")
+        stmt = select(stats.menu_item_id, quantity_sold).filter(
+            stats.restaurant_id == restaurant_id
+        )
+    else:
+        stats = models.RestaurantItemDailyStats
+        since = datetime.now(timezone.utc).date() - timedelta(days=days - 1)
+        quantity_sold = func.sum(stats.quantity_sold).label("quantity_sold")
+        stmt = (
+            select(stats.menu_item_id, quantity_sold)
+            .filter(stats.restaurant_id == restaurant_id, stats.day >= since)
+            .group_by(stats.menu_item_id)
+        )
+    top = stmt.order_by(desc(quantity_sold), stats.menu_item_id).limit(limit).subquery()
+    result = await db.execute(
+        select(
+            models.MenuItem.id.label("menu_item_id"),
+            models.MenuItem.name,
+            top.c.quantity_sold,
+        )
+        .join(top, top.c.menu_item_id == models.MenuItem.id)
+        .order_by(desc(top.c.quantity_sold), models.MenuItem.id)
+    )
+    return result.all()
 
 
 # Review CRUD
-def get_restaurant_reviews(db: Session, restaurant_id: int):
-    return (
-        db.query(models.Review)
+async def _apply_rating_delta(
+    db: AsyncSession,
+    restaurant_id: int,
+    added: Optional[int] = None,
+    removed: Optional[int] = None,
+):
+    """
+    Folds one review into a restaurant's running rating totals: `added` is
+    a rating being added, `removed` one being taken away (both for an
+    edit). Recomputes the average and the per-star counts in a single
+    UPDATE in the caller's transaction, so it never has to look at the
+    restaurant's other reviews.
+    """
+    rating_delta = (added or 0) - (removed or 0)
+    count_delta = (added is not None) - (removed is not None)
+    new_sum = models.Restaurant.rating_sum + rating_delta
+    new_count = models.Restaurant.rating_count + count_delta
+    values = {
+        models.Restaurant.rating_sum: new_sum,
+        models.Restaurant.rating_count: new_count,
+        models.Restaurant.rating: case(
+            (new_count > 0, func.round(cast(new_sum, Float) / new_count, 2)),
+            else_=0.0,
+        ),
+        models.Restaurant.version: models.Restaurant.version + 1,
+    }
+    # Ratings from before they were validated may be off the 1-5 scale;
+    # they count towards the average but have no star bucket.
+    if added in models.REVIEW_STARS:
+        star = models.Restaurant.star_column(added)
+        values[star] = star + 1
+    if removed in models.REVIEW_STARS:
+        star = models.Restaurant.star_column(removed)
+        values[star] = values.get(star, star) - 1
+    await db.execute(
+        update(models.Restaurant)
+        .where(models.Restaurant.id == restaurant_id)
+        .values(values)
+        .execution_options(synchronize_session=False)
+    )
+
+
+# Keyset columns per review sort order. Review ids grow with created_at,
+# so the id alone gives recency order.
+REVIEW_SORT_KEYS = {
+    schemas.ReviewSort.recent: ((models.Review.id,), True),
+    schemas.ReviewSort.highest: ((models.Review.rating, models.Review.id), True),
+    schemas.ReviewSort.lowest: ((models.Review.rating, models.Review.id), False),
+}
+
+
+async def get_restaurant_reviews(
+    db: AsyncSession,
+    restaurant_id: int,
+    sort: schemas.ReviewSort = schemas.ReviewSort.recent,
+    skip: int = 0,
+    limit: int = 20,
+    cursor: Optional[str] = None,
+) -> Page:
+    keys, descending = REVIEW_SORT_KEYS[sort]
+    return await paginate(
+        db,
+        select(models.Review)
         .options(joinedload(models.Review.customer))
-        .filter(models.Review.restaurant_id == restaurant_id)
-        .all()
+        .filter(models.Review.restaurant_id == restaurant_id),
+        keys,
+        limit,
+        skip=skip,
+        cursor=cursor,
+        descending=descending,
     )
 
 
-def get_customer_reviews(db: Session, customer_id: int):
-    return (
-        db.query(models.Review).filter(models.Review.customer_id == customer_id).all()
+async def get_customer_reviews(
+    db: AsyncSession, customer_id: int, skip: int = 0, limit: int = 50
+):
+    """One page of a customer's reviews, newest first, in a single query."""
+    result = await db.execute(
+        select(models.Review)
+        .options(joinedload(models.Review.customer))
+        .filter(models.Review.customer_id == customer_id)
+        .order_by(desc(models.Review.created_at), desc(models.Review.id))
+        .offset(skip)
+        .limit(limit)
     )
+    return result.scalars().all()
 
 
-def create_order_review(
-    db: Session,
+async def create_order_review(
+    db: AsyncSession,
     review: schemas.ReviewCreate,
     order_id: int,
     customer_id: int,
     restaurant_id: int,
 ):
     db_review = models.Review(
-        **review.dict(),
+        **review.model_dump(),
         order_id=order_id,
         customer_id=customer_id,
         restaurant_id=restaurant_id,
     )
     db.add(db_review)
-    db.commit()
-    db.refresh(db_review)
+    await _apply_rating_delta(db, restaurant_id, added=review.rating)
+    await _bump_version(db, models.Order, order_id)
+    await db.commit()
+    cache.restaurant_cache.invalidate(restaurant_id)
+    await db.refresh(db_review, ["customer"])
     return db_review
 
 
 # --- Menu Item CRUD ---
-def get_menu_item(db: Session, item_id: int):
-    return db.query(models.MenuItem).filter(models.MenuItem.id == item_id).first()
+async def get_menu_item(db: AsyncSession, item_id: int):
+    return await db.get(models.MenuItem, item_id)
+
+
+async def get_menu_item_detail(db: AsyncSession, item_id: int):
+    """
+    Read-through cached `Versioned(version, schemas.MenuItem)`, or None if
+    the item doesn't exist.
+    """
+    generation = cache.menu_item_cache.generation(item_id)
+    cached = cache.menu_item_cache.get(item_id)
+    if cached is None:
+        db_item = await get_menu_item(db, item_id)
+        if db_item is None:
+            return None
+        cached = Versioned(
+            db_item.version,
+            schemas.MenuItem.model_validate(db_item, from_attributes=True),
+        )
+        cache.menu_item_cache.set(item_id, cached, generation)
+    return cached
+
 
+async def get_menu_item_detail_version(db: AsyncSession, item_id: int):
+    """Like `get_restaurant_detail_version`, for `get_menu_item_detail`."""
+    return await _cached_version(db, cache.menu_item_cache, models.MenuItem, item_id)
 
-def get_menu_items(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(models.MenuItem).offset(skip).limit(limit).all()
+
+async def get_menu_items(
+    db: AsyncSession, skip: int = 0, limit: int = 100, cursor: Optional[str] = None
+) -> Page:
+    return await paginate(
+        db,
+        select(models.MenuItem),
+        (models.MenuItem.restaurant_id, models.MenuItem.id),
+        limit,
+        skip=skip,
+        cursor=cursor,
+    )
 
 
-def update_menu_item(db: Session, item_id: int, item: schemas.MenuItemUpdate):
-    db_item = get_menu_item(db, item_id)
+async def update_menu_item(
+    db: AsyncSession, item_id: int, item: schemas.MenuItemUpdate
+):
+    db_item = await get_menu_item(db, item_id)
     if not db_item:
         return None
-    item_data = item.dict(exclude_unset=True)
+    item_data = item.model_dump(exclude_unset=True)
     for key, value in item_data.items():
         setattr(db_item, key, value)
-    db.commit()
-    db.refresh(db_item)
+    db_item.version += 1
+    await _bump_version(db, models.Restaurant, db_item.restaurant_id)
+    await db.commit()
+    _invalidate_menu_item(db_item)
     return db_item
 
 
-def delete_menu_item(db: Session, item_id: int):
-    db_item = get_menu_item(db, item_id)
+async def delete_menu_item(db: AsyncSession, item_id: int):
+    db_item = await get_menu_item(db, item_id)
     if not db_item:
         return None
-    db.delete(db_item)
-    db.commit()
+    await db.delete(db_item)
+    await _bump_version(db, models.Restaurant, db_item.restaurant_id)
+    await db.commit()
+    _invalidate_menu_item(db_item)
     return db_item
 
 
-# --- Review CRUD ---
-def get_review(db: Session, review_id: int):
-    return db.query(models.Review).filter(models.Review.id == review_id).first()
+def _invalidate_menu_item(db_item: models.MenuItem):
+    # The item is cached on its own and nested in its restaurant's menu
+    cache.menu_item_cache.invalidate(db_item.id)
+    cache.restaurant_cache.invalidate(db_item.restaurant_id)
 
 
-def get_reviews(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(models.Review).offset(skip).limit(limit).all()
+# --- Review CRUD ---
+async def get_review(db: AsyncSession, review_id: int):
+    result = await db.execute(
+        select(models.Review)
+        .options(joinedload(models.Review.customer))
+        .filter(models.Review.id == review_id)
+    )
+    return result.scalars().first()
+
+
+async def get_reviews(
+    db: AsyncSession, skip: int = 0, limit: int = 100, cursor: Optional[str] = None
+) -> Page:
+    return await paginate(
+        db,
+        select(models.Review).options(joinedload(models.Review.customer)),
+        (models.Review.id,),
+        limit,
+        skip=skip,
+        cursor=cursor,
+    )
 
 
-def update_review(db: Session, review_id: int, review: schemas.ReviewUpdate):
-    db_review = get_review(db, review_id)
+async def update_review(db: AsyncSession, review_id: int, review: schemas.ReviewUpdate):
+    db_review = await get_review(db, review_id)
     if not db_review:
         return None
-    review_data = review.dict(exclude_unset=True)
+    old_rating = db_review.rating
+    review_data = review.model_dump(exclude_unset=True)
     for key, value in review_data.items():
         setattr(db_review, key, value)
-    db.commit()
-    db.refresh(db_review)
+    if db_review.rating != old_rating:
+        await _apply_rating_delta(
+            db, db_review.restaurant_id, added=db_review.rating, removed=old_rating
+        )
+    await _bump_version(db, models.Order, db_review.order_id)
+    await db.commit()
+    cache.restaurant_cache.invalidate(db_review.restaurant_id)
     return db_review
 
 
-def delete_review(db: Session, review_id: int):
-    db_review = get_review(db, review_id)
+async def delete_review(db: AsyncSession, review_id: int):
+    db_review = await get_review(db, review_id)
     if not db_review:
         return None
 
-    # Store restaurant_id before deleting for rating recalculation
+    # Store restaurant_id before deleting so the caller knows which
+    # restaurant was affected
     restaurant_id = db_review.restaurant_id
 
-    db.delete(db_review)
-    db.commit()
+    await db.delete(db_review)
+    await _apply_rating_delta(db, restaurant_id, removed=db_review.rating)
+    await _bump_version(db, models.Order, db_review.order_id)
+    await db.commit()
+    cache.restaurant_cache.invalidate(restaurant_id)
 
     return restaurant_id
@@ -1,22 +1,130 @@
-from sqlalchemy import create_engine
+import asyncio
+import os
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.util import await_only
 
 # Use SQLite for this example. For production, you'd use PostgreSQL, MySQL, etc.
-SQLALCHEMY_DATABASE_URL = "sqlite:///./zomato_v3.db"
+SQLALCHEMY_DATABASE_URL = os.getenv(
+    "ZOMATO_DATABASE_URL", "sqlite+aiosqlite:///./zomato_v3.db"
+)
+
+# SQLite PRAGMAs applied to every new connection, by profile name.
+# - "default": SQLite's own defaults (rollback journal, no mmap)
+# - "balanced": WAL so readers don't block on writers, NORMAL sync (safe in
+#   WAL mode, may lose the last commits on power loss, never corrupts)
+# - "durable": WAL with FULL sync, for when every commit must hit disk
+# - "bulk": for seeding/backfills only; no fsyncs at all
+SQLITE_PROFILES = {
+    "default": {},
+    "balanced": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -64000,  # negative = KiB, i.e. 64 MB
+        "mmap_size": 268435456,  # 256 MB
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000,  # ms
+    },
+    "durable": {
+        "journal_mode": "WAL",
+        "synchronous": "FULL",
+        "cache_size": -64000,
+        "mmap_size": 268435456,
+        "temp_store": "MEMORY",
+        "busy_timeout": 10000,
+    },
+    "bulk": {
+        "journal_mode": "WAL",
+        "synchronous": "OFF",
+        "cache_size": -256000,
+        "mmap_size": 1073741824,
+        "temp_store": "MEMORY",
+        "busy_timeout": 30000,
+    },
+}
+
+SQLITE_PROFILE = os.getenv("ZOMATO_SQLITE_PROFILE", "balanced")
+if SQLITE_PROFILE not in SQLITE_PROFILES:
+    raise ValueError(
+        f"Unknown ZOMATO_SQLITE_PROFILE {SQLITE_PROFILE!r}; "
+        f"expected one of {', '.join(SQLITE_PROFILES)}"
+    )
+
+engine = create_async_engine(
+    SQLALCHEMY_DATABASE_URL,
+    connect_args={"check_same_thread": False},
+    pool_size=int(os.getenv("ZOMATO_DB_POOL_SIZE", "10")),
+    max_overflow=int(os.getenv("ZOMATO_DB_MAX_OVERFLOW", "20")),
+    pool_timeout=float(os.getenv("ZOMATO_DB_POOL_TIMEOUT", "30")),
+)
+
+
+@event.listens_for(engine.sync_engine, "connect")
+def _apply_sqlite_profile(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    for pragma, value in SQLITE_PROFILES[SQLITE_PROFILE].items():
+        cursor.execute(f"PRAGMA {pragma}={value}")
+    cursor.close()
+
+
+# Opt-in in-process write queue. SQLite takes one writer at a time, and
+# writers waiting on busy_timeout poll with sleeps of up to 100 ms, so under
+# heavy write contention an unlucky writer can wait out the whole timeout.
+# With the queue on, a transaction waits for its turn right before its
+# first INSERT/UPDATE/DELETE and gives it up at commit or rollback, which is
+# when SQLite's own write lock is held. Reads never wait on it. It is per
+# process: across workers, busy_timeout still applies.
+SQLITE_WRITE_QUEUE = os.getenv("ZOMATO_SQLITE_WRITE_QUEUE", "") == "1"
+_WRITE_STATEMENTS = ("INSERT", "UPDATE", "DELETE", "REPLACE")
+_write_queue = asyncio.Lock()
+
+
+def _leave_write_queue(info: dict):
+    if info.pop("in_write_queue", False):
+        _write_queue.release()
+
+
+if SQLITE_WRITE_QUEUE:
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def _enter_write_queue(conn, cursor, statement, parameters, context, executemany):
+        if conn.info.get("in_write_queue"):
+            return
+        if not statement.lstrip().upper().startswith(_WRITE_STATEMENTS):
+            return
+        # Runs inside SQLAlchemy's greenlet, so it can wait on the event loop
+        await_only(_write_queue.acquire())
+        conn.info["in_write_queue"] = True
+
+    @event.listens_for(engine.sync_engine, "commit")
+    @event.listens_for(engine.sync_engine, "rollback")
+    def _end_write_transaction(conn):
+        _leave_write_queue(conn.info)
+
+    @event.listens_for(engine.sync_engine.pool, "checkin")
+    def _check_in_write_queue(dbapi_connection, connection_record):
+        # A connection returned mid-transaction must not keep its turn
+        _leave_write_queue(connection_record.info)
+
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
+# Objects stay loaded after commit: with AsyncSession an expired attribute
+# can't be lazily reloaded, so everything a response needs is loaded
+# explicitly (eager-loading options or RETURNING) instead.
+AsyncSessionLocal = sessionmaker(
+    autocommit=False,
+    autoflush=False,
+    bind=engine,
+    class_=AsyncSession,
+    expire_on_commit=False,
 )
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
 
 # Dependency to get a DB session
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+async def get_db():
+    async with AsyncSessionLocal() as session:
+        yield session
@@ -0,0 +1,36 @@
+from fastapi import Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import crud, models
+from .database import get_db
+
+
+# Shared path dependencies for routes nested under a parent resource
+async def get_restaurant_or_404(
+    restaurant_id: int, db: AsyncSession = Depends(get_db)
+) -> models.Restaurant:
+    """
+    Resolves the `restaurant_id` path parameter to the restaurant row alone
+    (no menu or other relationships), or responds 404.
+    """
+    return await _restaurant_summary_or_404(db, restaurant_id)
+
+
+async def get_streamed_restaurant_or_404(
+    restaurant_id: int, db: AsyncSession = Depends(get_db, scope="function")
+) -> models.Restaurant:
+    """
+    `get_restaurant_or_404` for routes that return a streaming body. Its
+    session is closed as soon as the route function returns; a request-scoped
+    one would hold its pooled connection until the stream ends.
+    """
+    return await _restaurant_summary_or_404(db, restaurant_id)
+
+
+async def _restaurant_summary_or_404(
+    db: AsyncSession, restaurant_id: int
+) -> models.Restaurant:
+    db_restaurant = await crud.get_restaurant_summary(db, restaurant_id)
+    if db_restaurant is None:
+        raise HTTPException(status_code=404, detail="Restaurant not found")
+    return db_restaurant
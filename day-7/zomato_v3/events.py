@@ -0,0 +1,145 @@
+"""
+In-process pub/sub for live order updates, served as server-sent events.
+
+Writers publish an event to a topic (`order:<id>`, `restaurant:<id>`) after
+their transaction commits, and every open stream on that topic gets a copy
+through its own bounded queue. A client tracking an order is a parked
+coroutine and an empty queue until its order actually changes, instead of
+a poll every few seconds.
+
+A subscriber that falls behind loses its oldest queued events instead of
+slowing down the writer or growing its queue without bound. Each event
+carries the order's full status and version, so the newest one is the one
+that matters. Like the caches, this is per process: with several workers,
+a stream only sees writes handled by its own worker.
+"""
+
+import asyncio
+import json
+import os
+from contextlib import contextmanager
+from typing import AsyncIterator, Awaitable, Callable, Dict, Optional, Set
+
+QUEUE_SIZE = int(os.getenv("ZOMATO_EVENT_QUEUE_SIZE", "64"))
+# Comment frames keep idle connections from being closed by proxies
+KEEPALIVE_SECONDS = float(os.getenv("ZOMATO_SSE_KEEPALIVE", "15"))
+
+# Headers for `text/event-stream` responses; X-Accel-Buffering stops nginx
+# from holding events back in its buffer.
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+def order_topic(order_id: int) -> str:
+    return f"order:{order_id}"
+
+
+def restaurant_topic(restaurant_id: int) -> str:
+    return f"restaurant:{restaurant_id}"
+
+
+class EventBroker:
+    """Fans events out to per-subscriber bounded queues, keyed by topic."""
+
+    def __init__(self, queue_size: int = 64):
+        self.queue_size = queue_size
+        self._topics: Dict[str, Set[asyncio.Queue]] = {}
+        self.published = 0
+        self.dropped = 0
+
+    @contextmanager
+    def subscribe(self, topic: str):
+        """Registers a queue on `topic` for the duration of the block."""
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self._topics.setdefault(topic, set()).add(queue)
+        try:
+            yield queue
+        finally:
+            subscribers = self._topics.get(topic)
+            if subscribers is not None:
+                subscribers.discard(queue)
+                if not subscribers:
+                    del self._topics[topic]
+
+    def publish(self, topic: str, event: dict):
+        """Queues `event` for every subscriber of `topic`; never blocks."""
+        for queue in self._topics.get(topic, ()):
+            if queue.full():
+                queue.get_nowait()
+                self.dropped += 1
+            queue.put_nowait(event)
+        self.published += 1
+
+    def stats(self) -> dict:
+        return {
+            "topics": len(self._topics),
+            "subscribers": sum(len(queues) for queues in self._topics.values()),
+            "queue_size": self.queue_size,
+            "published": self.published,
+            "dropped": self.dropped,
+        }
+
+
+broker = EventBroker(queue_size=QUEUE_SIZE)
+
+
+def order_event(event_type: str, order) -> dict:
+    """
+    The event payload for an order, from anything with the order's columns
+    (an ORM object or a `crud.ORDER_STATUS_CHANGE_COLUMNS` row).
+    """
+    previous_status = order.previous_status
+    return {
+        "type": event_type,
+        "order_id": order.id,
+        "restaurant_id": order.restaurant_id,
+        "customer_id": order.customer_id,
+        "order_status": order.order_status.value,
+        "previous_status": previous_status.value if previous_status else None,
+        "version": order.version,
+        "total_amount": order.total_amount,
+        "order_date": order.order_date.isoformat(),
+    }
+
+
+def publish_order(event_type: str, order):
+    """Publishes an order event to both the order's and its restaurant's topic."""
+    event = order_event(event_type, order)
+    broker.publish(order_topic(order.id), event)
+    broker.publish(restaurant_topic(order.restaurant_id), event)
+
+
+def format_sse(event: dict) -> str:
+    return (
+        f"event: {event['type']}\n"
+        f"data: {json.dumps(event, separators=(',', ':'))}\n\n"
+    )
+
+
+async def stream(
+    topic: str,
+    snapshot: Optional[Callable[[], Awaitable[Optional[dict]]]] = None,
+    until: Optional[Callable[[dict], bool]] = None,
+) -> AsyncIterator[str]:
+    """
+    Server-sent event frames for `topic` until the client disconnects.
+
+    `snapshot` returns the first event to send. It runs after subscribing, so
+    no change can slip in between it and the live events. The stream ends
+    after the first event (snapshot included) that `until` accepts.
+    """
+    with broker.subscribe(topic) as queue:
+        if snapshot is not None:
+            event = await snapshot()
+            if event is not None:
+                yield format_sse(event)
+                if until is not None and until(event):
+                    return
+        while True:
+            try:
+                event = await asyncio.wait_for(queue.get(), KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            yield format_sse(event)
+            if until is not None and until(event):
+                return
@@ -0,0 +1,297 @@
+"""
+Per-request SQL statement counts and database time.
+
+Cursor-execute hooks on the engine add each statement's duration to the
+stats of the request being served, tracked in a context variable (the
+greenlets SQLAlchemy's async layer runs in inherit it). `QueryStatsMiddleware`
+sends them back on every response as `X-DB-Queries` and `Server-Timing`
+headers, and folds them into per-route totals served at
+`GET /admin/queries`: an N+1 regression shows up as a route whose queries
+per request grow with the data.
+
+Headers are sent before a streaming body, so for streamed responses they
+only cover the statements run up to that point; the per-route totals
+include the whole body.
+
+The same hooks feed the slow-query log: any statement taking at least
+`ZOMATO_SLOW_QUERY_MS` is written as a JSON line to a rotating file
+(`ZOMATO_SLOW_QUERY_LOG`) with its duration, parameters and, on SQLite,
+its `EXPLAIN QUERY PLAN`, and is tallied per statement for
+`GET /admin/slow-queries`. Parameter values are replaced by their type
+names unless `ZOMATO_SLOW_QUERY_PARAMS=show`.
+"""
+
+import json
+import logging
+import os
+import time
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import RotatingFileHandler
+from typing import Optional
+
+from sqlalchemy import event
+from starlette.datastructures import MutableHeaders
+
+from .database import engine
+
+QUERY_COUNT_HEADER = "X-DB-Queries"
+
+SLOW_QUERY_SECONDS = float(os.getenv("ZOMATO_SLOW_QUERY_MS", "100")) / 1e3
+SLOW_QUERY_LOG = os.getenv("ZOMATO_SLOW_QUERY_LOG", "slow_queries.log")
+SLOW_QUERY_LOG_BYTES = int(os.getenv("ZOMATO_SLOW_QUERY_LOG_BYTES", "10485760"))
+SLOW_QUERY_LOG_BACKUPS = int(os.getenv("ZOMATO_SLOW_QUERY_LOG_BACKUPS", "5"))
+SHOW_SLOW_QUERY_PARAMS = os.getenv("ZOMATO_SLOW_QUERY_PARAMS", "redact") == "show"
+# Distinct statements tallied for the admin endpoint
+SLOW_QUERY_STATEMENTS = 200
+
+logger = logging.getLogger(__name__)
+
+
+class QueryStats:
+    """Statements executed and seconds spent in them, for one request."""
+
+    __slots__ = ("count", "duration")
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+
+_current_stats: ContextVar[Optional[QueryStats]] = ContextVar(
+    "query_stats", default=None
+)
+
+
+@event.listens_for(engine.sync_engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._query_started = time.perf_counter()
+
+
+@event.listens_for(engine.sync_engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - context._query_started
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.count += 1
+        stats.duration += elapsed
+    if elapsed >= SLOW_QUERY_SECONDS:
+        # Logging must never fail the statement it reports on
+        try:
+            slow_query_log.record(conn, statement, parameters, executemany, elapsed)
+        except Exception:
+            logger.exception("Could not record a slow query")
+
+
+def _query_plan(conn, statement: str, parameters):
+    """SQLite's EXPLAIN QUERY PLAN details, one line per plan step."""
+    if conn.dialect.name != "sqlite":
+        return None
+    if (
+        not statement.lstrip()
+        .upper()
+        .startswith(("SELECT", "WITH", "INSERT", "UPDATE", "DELETE"))
+    ):
+        return None
+    # A raw DBAPI cursor on the same connection, so this neither fires the
+    # hooks again nor shows up in the request's query count
+    cursor = conn.connection.cursor()
+    try:
+        cursor.execute("EXPLAIN QUERY PLAN " + statement, parameters)
+        return [row[3] for row in cursor.fetchall()]
+    except Exception as e:
+        return [f"EXPLAIN QUERY PLAN failed: {e}"]
+    finally:
+        cursor.close()
+
+
+def _loggable_parameters(parameters):
+    if SHOW_SLOW_QUERY_PARAMS:
+        return parameters
+    if isinstance(parameters, dict):
+        return {name: type(value).__name__ for name, value in parameters.items()}
+    return [type(value).__name__ for value in parameters]
+
+
+class SlowQueryLog:
+    """
+    Writes slow statements to the slow-query logger and keeps per-statement
+    totals (bounded to `max_statements`; the least costly is dropped).
+    """
+
+    def __init__(self, logger: logging.Logger, max_statements: int = 200):
+        self.logger = logger
+        self.max_statements = max_statements
+        self._statements = {}  # statement -> entry dict
+
+    def record(self, conn, statement, parameters, executemany, seconds):
+        # For executemany, the first parameter set stands in for all of them.
+        # A multi-row INSERT ... RETURNING is flagged executemany too, but
+        # its parameters are one flat tuple of values.
+        if (
+            executemany
+            and parameters
+            and isinstance(parameters[0], (tuple, list, dict))
+        ):
+            first = parameters[0]
+        else:
+            first = parameters
+        plan = _query_plan(conn, statement, first)
+        logged_parameters = _loggable_parameters(first or ())
+        now = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        self.logger.warning(
+            json.dumps(
+                {
+                    "at": now,
+                    "duration_ms": round(seconds * 1e3, 3),
+                    "statement": statement,
+                    "parameters": logged_parameters,
+                    "executemany": (
+                        len(parameters) if first is not parameters else None
+                    ),
+                    "plan": plan,
+                },
+                default=str,
+            )
+        )
+
+        entry = self._statements.get(statement)
+        if entry is None:
+            if len(self._statements) >= self.max_statements:
+                cheapest = min(
+                    self._statements, key=lambda s: self._statements[s]["total_ms"]
+                )
+                del self._statements[cheapest]
+            entry = self._statements[statement] = {
+                "statement": statement,
+                "count": 0,
+                "total_ms": 0.0,
+                "max_ms": 0.0,
+            }
+        duration_ms = seconds * 1e3
+        entry["count"] += 1
+        entry["total_ms"] += duration_ms
+        entry["max_ms"] = max(entry["max_ms"], duration_ms)
+        entry["last_seen"] = now
+        entry["last_parameters"] = logged_parameters
+        entry["plan"] = plan
+
+    def clear(self):
+        self._statements.clear()
+
+    def worst(self, limit: int = 20, key: str = "total_ms") -> list:
+        """The `limit` statements with the highest `key` (total_ms or max_ms)."""
+        entries = sorted(self._statements.values(), key=lambda e: e[key], reverse=True)
+        return [
+            {
+                **entry,
+                "total_ms": round(entry["total_ms"], 3),
+                "max_ms": round(entry["max_ms"], 3),
+                "mean_ms": round(entry["total_ms"] / entry["count"], 3),
+            }
+            for entry in entries[:limit]
+        ]
+
+
+def _slow_query_logger() -> logging.Logger:
+    logger = logging.getLogger("zomato_v3.slow_queries")
+    logger.propagate = False
+    if SLOW_QUERY_LOG and not logger.handlers:
+        handler = RotatingFileHandler(
+            SLOW_QUERY_LOG,
+            maxBytes=SLOW_QUERY_LOG_BYTES,
+            backupCount=SLOW_QUERY_LOG_BACKUPS,
+            delay=True,
+        )
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+    elif not logger.handlers:
+        # Without a handler, logging's last resort would print to stderr
+        logger.addHandler(logging.NullHandler())
+    return logger
+
+
+slow_query_log = SlowQueryLog(_slow_query_logger(), SLOW_QUERY_STATEMENTS)
+
+
+class RouteQueryStats:
+    """Query counts and database time per route, across requests."""
+
+    def __init__(self):
+        # route -> [requests, queries, max queries, seconds, max seconds]
+        self._routes = {}
+
+    def record(self, route: str, stats: QueryStats):
+        totals = self._routes.get(route)
+        if totals is None:
+            totals = self._routes[route] = [0, 0, 0, 0.0, 0.0]
+        totals[0] += 1
+        totals[1] += stats.count
+        totals[2] = max(totals[2], stats.count)
+        totals[3] += stats.duration
+        totals[4] = max(totals[4], stats.duration)
+
+    def clear(self):
+        self._routes.clear()
+
+    def stats(self) -> dict:
+        return {
+            route: {
+                "requests": requests,
+                "queries_per_request": round(queries / requests, 2),
+                "max_queries": max_queries,
+                "db_ms_per_request": round(seconds / requests * 1e3, 3),
+                "max_db_ms": round(max_seconds * 1e3, 3),
+            }
+            for route, (
+                requests,
+                queries,
+                max_queries,
+                seconds,
+                max_seconds,
+            ) in sorted(self._routes.items())
+        }
+
+
+route_query_stats = RouteQueryStats()
+
+
+def route_name(scope) -> Optional[str]:
+    """`"GET /orders/{order_id}"` for a request matched to a route, else None."""
+    route = scope.get("route")
+    if route is None:
+        return None
+    return f"{scope['method']} {route.path}"
+
+
+class QueryStatsMiddleware:
+    """ASGI middleware collecting `QueryStats` for each HTTP request."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = _current_stats.set(stats)
+
+        async def send_with_query_stats(message):
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers.append(QUERY_COUNT_HEADER, str(stats.count))
+                headers.append(
+                    "Server-Timing",
+                    f'db;dur={stats.duration * 1e3:.2f};desc="{stats.count} queries"',
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_query_stats)
+        finally:
+            _current_stats.reset(token)
+            route = route_name(scope)
+            if route is not None:
+                route_query_stats.record(route, stats)
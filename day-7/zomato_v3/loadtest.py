@@ -0,0 +1,383 @@
+"""
+Load generator for the v3 API.
+
+Run from the directory containing the `zomato_v3` package, e.g.:
+
+    python -m zomato_v3.loadtest --requests 5000 --concurrency 16
+    python -m zomato_v3.loadtest --base-url http://127.0.0.1:8000
+
+Without `--base-url` the app runs in-process (through httpx's ASGI
+transport) against the database named by `ZOMATO_DATABASE_URL`; with it,
+requests go to an already running server. `--app module:attribute` runs a
+different ASGI app in-process instead, e.g. a checkout of an older commit
+copied under another package name, to compare the two on the same
+traffic (`syncbench` does this for the pre-async app). The restaurants, menus and customers the traffic uses are read
+from the API at startup. If the database has none, a small fixture is
+created through the API first.
+
+Each worker draws actions from a weighted mix: browse the restaurant list,
+view a restaurant's menu, place an order, advance one of its own orders
+along the status flow, and review one of its delivered orders. The random
+choices come from `--seed`, so a run can be repeated on another commit and
+the reports compared. Prints a JSON report with overall throughput and,
+per route, request count, error count, p50/p95/p99 latency in
+milliseconds and SQL statements per request (from `X-DB-Queries`).
+"""
+
+import argparse
+import asyncio
+import importlib
+import json
+import math
+import random
+import sys
+import time
+from collections import Counter, defaultdict
+
+import httpx
+
+from .instrumentation import QUERY_COUNT_HEADER
+from .models import ORDER_STATUS_FLOW, OrderStatus
+
+DEFAULT_MIX = {
+    "browse": 30,
+    "menu": 30,
+    "order": 15,
+    "status": 15,
+    "review": 5,
+    "order_detail": 5,
+}
+
+
+class LoadStats:
+    """Latencies, status codes and SQL statement counts per route template."""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.status_codes = defaultdict(Counter)
+        self.db_queries = Counter()
+
+    def record(self, route: str, seconds: float, response: httpx.Response):
+        self.latencies[route].append(seconds)
+        self.status_codes[route][response.status_code] += 1
+        self.db_queries[route] += int(response.headers.get(QUERY_COUNT_HEADER, 0))
+
+    def report(self, elapsed: float) -> dict:
+        routes = {}
+        for route in sorted(self.latencies):
+            latencies = sorted(self.latencies[route])
+            codes = self.status_codes[route]
+            routes[route] = {
+                "requests": len(latencies),
+                "errors": sum(n for code, n in codes.items() if code >= 400),
+                "throughput_rps": round(len(latencies) / elapsed, 1),
+                "mean_ms": round(sum(latencies) / len(latencies) * 1e3, 2),
+                "p50_ms": round(percentile(latencies, 50) * 1e3, 2),
+                "p95_ms": round(percentile(latencies, 95) * 1e3, 2),
+                "p99_ms": round(percentile(latencies, 99) * 1e3, 2),
+                "max_ms": round(latencies[-1] * 1e3, 2),
+                "db_queries_per_request": round(
+                    self.db_queries[route] / len(latencies), 2
+                ),
+                "status_codes": {str(code): n for code, n in sorted(codes.items())},
+            }
+        total = sum(route["requests"] for route in routes.values())
+        return {
+            "elapsed_s": round(elapsed, 3),
+            "requests": total,
+            "errors": sum(route["errors"] for route in routes.values()),
+            "throughput_rps": round(total / elapsed, 1),
+            "routes": routes,
+        }
+
+
+def percentile(sorted_values, q: float) -> float:
+    """Nearest-rank percentile of an already sorted, non-empty list."""
+    index = max(0, math.ceil(q / 100 * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+
+def parse_mix(value: str) -> dict:
+    """`browse=30,menu=30,...` -> {"browse": 30, ...}; unnamed actions get 0."""
+    mix = dict.fromkeys(DEFAULT_MIX, 0)
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in mix:
+            raise argparse.ArgumentTypeError(
+                f"unknown action {name!r}; expected one of {', '.join(mix)}"
+            )
+        mix[name] = int(weight)
+    if not any(mix.values()):
+        raise argparse.ArgumentTypeError("the mix needs at least one positive weight")
+    return mix
+
+
+class Worker:
+    """One simulated client: its own RNG and the orders it has placed."""
+
+    def __init__(self, client, stats, fixture, rng, mix):
+        self.client = client
+        self.stats = stats
+        self.fixture = fixture
+        self.rng = rng
+        self.actions = list(mix)
+        self.weights = list(mix.values())
+        self.open_orders = []  # [order_id, status], not yet delivered
+        self.delivered_orders = []  # order ids, not yet reviewed
+
+    async def request(self, route: str, method: str, url: str, **kwargs):
+        start = time.perf_counter()
+        response = await self.client.request(method, url, **kwargs)
+        self.stats.record(route, time.perf_counter() - start, response)
+        return response
+
+    async def run(self, requests: int):
+        for _ in range(requests):
+            action = self.rng.choices(self.actions, self.weights)[0]
+            await getattr(self, action)()
+
+    async def browse(self):
+        await self.request("GET /restaurants/", "GET", "/restaurants/?limit=20")
+
+    async def menu(self):
+        restaurant_id = self.rng.choice(self.fixture["restaurant_ids"])
+        await self.request(
+            "GET /restaurants/{restaurant_id}", "GET", f"/restaurants/{restaurant_id}"
+        )
+
+    async def order(self):
+        restaurant_id = self.rng.choice(self.fixture["restaurant_ids"])
+        menu = self.fixture["menus"][restaurant_id]
+        items = self.rng.sample(menu, min(len(menu), self.rng.randint(1, 3)))
+        customer_id = self.rng.choice(self.fixture["customer_ids"])
+        response = await self.request(
+            "POST /customers/{customer_id}/orders/",
+            "POST",
+            f"/customers/{customer_id}/orders/",
+            json={
+                "restaurant_id": restaurant_id,
+                "items": [
+                    {"menu_item_id": item_id, "quantity": self.rng.randint(1, 3)}
+                    for item_id in items
+                ],
+            },
+        )
+        if response.status_code == 201:
+            self.open_orders.append([response.json()["id"], OrderStatus.placed])
+
+    async def status(self):
+        if not self.open_orders:
+            return await self.order()
+        entry = self.rng.choice(self.open_orders)
+        order_id, current = entry
+        new_status = ORDER_STATUS_FLOW[ORDER_STATUS_FLOW.index(current) + 1]
+        response = await self.request(
+            "PUT /orders/{order_id}/status",
+            "PUT",
+            f"/orders/{order_id}/status?slim=true",
+            json={"status": new_status.value},
+        )
+        if response.status_code == 200:
+            entry[1] = new_status
+            if new_status == OrderStatus.delivered:
+                self.open_orders.remove(entry)
+                self.delivered_orders.append(order_id)
+
+    async def review(self):
+        if not self.delivered_orders:
+            return await self.status()
+        order_id = self.delivered_orders.pop(
+            self.rng.randrange(len(self.delivered_orders))
+        )
+        await self.request(
+            "POST /orders/{order_id}/review",
+            "POST",
+            f"/orders/{order_id}/review",
+            json={"rating": self.rng.randint(1, 5), "comment": "Load test"},
+        )
+
+    async def order_detail(self):
+        orders = [entry[0] for entry in self.open_orders] + self.delivered_orders
+        if not orders:
+            return await self.browse()
+        order_id = self.rng.choice(orders)
+        await self.request("GET /orders/{order_id}", "GET", f"/orders/{order_id}")
+
+
+async def fetch_all(client, path: str, limit: int, page_size: int = 100):
+    """Follows X-Next-Cursor until `limit` records have been read."""
+    records, params = [], {"limit": page_size}
+    while len(records) < limit:
+        response = await client.get(path, params=params)
+        response.raise_for_status()
+        records.extend(response.json())
+        cursor = response.headers.get("x-next-cursor")
+        if not cursor:
+            break
+        params = {"limit": page_size, "cursor": cursor}
+    return records[:limit]
+
+
+async def create_fixture(
+    client, rng, restaurants: int, menu_items: int, customers: int
+):
+    cuisines = ["North Indian", "South Indian", "Chinese", "Italian", "Mexican"]
+    for r in range(restaurants):
+        response = await client.post(
+            "/restaurants/",
+            json={
+                "name": f"Load Test Kitchen {r}",
+                "location": f"Sector {rng.randint(1, 50)}",
+                "cuisine": rng.choice(cuisines),
+            },
+        )
+        response.raise_for_status()
+        restaurant_id = response.json()["id"]
+        for i in range(menu_items):
+            await client.post(
+                f"/restaurants/{restaurant_id}/menu-items/",
+                json={"name": f"Dish {i}", "price": rng.randint(50, 600)},
+            )
+    for c in range(customers):
+        await client.post(
+            "/customers/",
+            json={
+                "name": f"Load Test Customer {c}",
+                "email": f"loadtest-{c}@example.com",
+                "phone_number": f"+91 90000 {c:05d}",
+                "address": f"{c} Load Test Road",
+            },
+        )
+
+
+async def load_fixture(client, args):
+    """Restaurant ids, their available menu item ids, and customer ids."""
+    restaurants = await fetch_all(client, "/restaurants/", args.max_restaurants)
+    customers = await fetch_all(client, "/customers/", args.max_customers)
+    menus = {}
+    for restaurant in restaurants:
+        available = [
+            item["id"] for item in restaurant["menu_items"] if item["is_available"]
+        ]
+        if available:
+            menus[restaurant["id"]] = available
+    return {
+        "restaurant_ids": sorted(menus),
+        "menus": menus,
+        "customer_ids": [customer["id"] for customer in customers],
+    }
+
+
+async def drive(client, args) -> dict:
+    fixture = await load_fixture(client, args)
+    if not fixture["restaurant_ids"] or not fixture["customer_ids"]:
+        await create_fixture(
+            client,
+            random.Random(args.seed),
+            args.fixture_restaurants,
+            args.fixture_menu_items,
+            args.fixture_customers,
+        )
+        fixture = await load_fixture(client, args)
+
+    stats = LoadStats()
+    workers = [
+        Worker(client, stats, fixture, random.Random(args.seed * 1000 + n), args.mix)
+        for n in range(args.concurrency)
+    ]
+    per_worker, extra = divmod(args.requests, args.concurrency)
+    start = time.perf_counter()
+    await asyncio.gather(
+        *(
+            worker.run(per_worker + (1 if n < extra else 0))
+            for n, worker in enumerate(workers)
+        )
+    )
+    report = stats.report(time.perf_counter() - start)
+    return {
+        "target": args.base_url or args.app or "in-process",
+        "seed": args.seed,
+        "concurrency": args.concurrency,
+        "mix": args.mix,
+        "restaurants": len(fixture["restaurant_ids"]),
+        "customers": len(fixture["customer_ids"]),
+        **report,
+    }
+
+
+def import_app(path: str):
+    """`"package.module:attribute"` -> the ASGI app it names."""
+    module_name, _, attribute = path.partition(":")
+    return getattr(importlib.import_module(module_name), attribute or "app")
+
+
+async def drive_in_process(app, args) -> dict:
+    # Runs the app's startup handlers (table creation, migrations) first
+    async with app.router.lifespan_context(app):
+        # App exceptions come back as 500s, like a server would send them
+        transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://zomato", timeout=60
+        ) as client:
+            return await drive(client, args)
+
+
+async def run(args) -> dict:
+    if args.base_url:
+        async with httpx.AsyncClient(base_url=args.base_url, timeout=60) as client:
+            return await drive(client, args)
+    if args.app:
+        return await drive_in_process(import_app(args.app), args)
+
+    from .database import engine
+    from .main import app
+
+    try:
+        return await drive_in_process(app, args)
+    finally:
+        await engine.dispose()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--base-url", help="URL of a running server; default runs the app in-process"
+    )
+    parser.add_argument(
+        "--app",
+        help="module:attribute of another ASGI app to run in-process "
+        "instead of zomato_v3.main:app",
+    )
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument(
+        "--mix",
+        type=parse_mix,
+        default=DEFAULT_MIX,
+        help="action weights, e.g. browse=30,menu=30,order=15,status=15,"
+        "review=5,order_detail=5",
+    )
+    parser.add_argument("--max-restaurants", type=int, default=200)
+    parser.add_argument("--max-customers", type=int, default=1000)
+    parser.add_argument("--fixture-restaurants", type=int, default=20)
+    parser.add_argument("--fixture-menu-items", type=int, default=15)
+    parser.add_argument("--fixture-customers", type=int, default=200)
+    parser.add_argument("--output", help="write the JSON report here instead")
+    args = parser.parse_args(argv)
+    if args.concurrency < 1 or args.requests < 1:
+        parser.error("--requests and --concurrency must be positive")
+
+    report = asyncio.run(run(args))
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as output:
+            output.write(text + "\n")
+    else:
+        print(text)
+    return 0 if report["errors"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,12 +1,30 @@
 from fastapi import FastAPI
+from fastapi.responses import Response
 from .database import engine, Base
+from .instrumentation import QueryStatsMiddleware
+from .metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE
+from .metrics import MetricsMiddleware, request_metrics
+from .migrations import run_migrations
 
 # Import the new routers
-from .routes import restaurants, customers, orders, menu_items, reviews
+from .routes import (
+    restaurants,
+    customers,
+    orders,
+    menu_items,
+    reviews,
+    search,
+    admin,
+)
+
 
-# This line creates the database tables.
+# Asynchronously create the database tables and apply migrations on startup.
 # In a production environment with Alembic, you might remove this.
-Base.metadata.create_all(bind=engine)
+async def create_tables():
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    await run_migrations(engine)
+
 
 app = FastAPI(
     title="Zomato v3 - Food Delivery System",
@@ -14,6 +32,17 @@ app = FastAPI(
     version="3.0.0",
 )
 
+# Query count and DB time per request (X-DB-Queries / Server-Timing headers)
+app.add_middleware(QueryStatsMiddleware)
+# Request counters, latency histograms and pool gauges for GET /metrics
+app.add_middleware(MetricsMiddleware)
+
+
+@app.on_event("startup")
+async def on_startup():
+    await create_tables()
+
+
 # Include all the routers from the 'routes' package
 app.include_router(restaurants.router)
 app.include_router(customers.router)
@@ -21,8 +50,16 @@ app.include_router(orders.router)
 # Add the new routers to the app
 app.include_router(menu_items.router)
 app.include_router(reviews.router)
+app.include_router(search.router)
+app.include_router(admin.router)
 
 
 @app.get("/", tags=["Root"])
-def read_root():
+async def read_root():
     return {"message": "Welcome to the Zomato v3 API"}
+
+
+@app.get("/metrics", include_in_schema=False)
+async def read_metrics():
+    """Prometheus text exposition of request and connection pool metrics."""
+    return Response(request_metrics.render(), media_type=METRICS_CONTENT_TYPE)
@@ -0,0 +1,183 @@
+"""
+Maintenance commands for the Zomato v3 database.
+
+Run from the directory containing the `zomato_v3` package, e.g.:
+
+    python -m zomato_v3.manage rebuild-ratings
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+
+from .database import AsyncSessionLocal, engine, Base
+from .migrations import rebuild_fts_statements, run_migrations
+from .utils import business_logic, seeding
+
+
+async def rebuild_ratings(args):
+    async with AsyncSessionLocal() as db:
+        updated = await business_logic.rebuild_restaurant_ratings(
+            db, restaurant_id=args.restaurant_id
+        )
+    print(f"Rebuilt rating counters for {updated} restaurant(s).")
+
+
+async def rebuild_analytics(args):
+    async with AsyncSessionLocal() as db:
+        written = await business_logic.rebuild_restaurant_stats(
+            db, restaurant_id=args.restaurant_id
+        )
+    print(f"Rebuilt analytics rollups for {written} restaurant(s).")
+
+
+async def rebuild_search(args):
+    async with engine.begin() as conn:
+        for stmt in rebuild_fts_statements():
+            await conn.execute(stmt)
+    print("Rebuilt full-text search indexes.")
+
+
+async def customer_analytics(args):
+    output = open(args.output, "w") if args.output else sys.stdout
+    count = 0
+    try:
+        async with AsyncSessionLocal() as db:
+            async for customer_id, analytics in business_logic.iter_customer_analytics(
+                db, chunk_size=args.chunk_size
+            ):
+                record = {"customer_id": customer_id, **analytics.model_dump()}
+                output.write(json.dumps(record) + "\n")
+                count += 1
+    finally:
+        if args.output:
+            output.close()
+    print(f"Computed analytics for {count} customer(s).", file=sys.stderr)
+
+
+async def seed(args):
+    def progress(table, done, total):
+        print(f"{table}: {done}/{total}", file=sys.stderr)
+
+    started = time.perf_counter()
+    counts = await seeding.seed_database(
+        engine,
+        restaurants=args.restaurants,
+        menu_items=args.menu_items,
+        customers=args.customers,
+        orders=args.orders,
+        max_items_per_order=args.max_items_per_order,
+        review_rate=args.review_rate,
+        days=args.days,
+        restaurant_skew=args.restaurant_skew,
+        customer_skew=args.customer_skew,
+        item_skew=args.item_skew,
+        seed=args.seed,
+        batch_size=args.batch_size,
+        progress=progress,
+    )
+    elapsed = time.perf_counter() - started
+    print(", ".join(f"{count} {table}" for table, count in counts.items()))
+    print(f"Seeded in {elapsed:.1f}s.")
+
+
+async def run(args):
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    await run_migrations(engine)
+    try:
+        await args.func(args)
+    finally:
+        await engine.dispose()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    ratings = subparsers.add_parser(
+        "rebuild-ratings",
+        help="Recompute restaurant rating totals from the reviews table.",
+    )
+    ratings.add_argument(
+        "--restaurant-id", type=int, help="Only rebuild this restaurant."
+    )
+    ratings.set_defaults(func=rebuild_ratings)
+
+    analytics = subparsers.add_parser(
+        "rebuild-analytics",
+        help="Recompute the per-restaurant analytics rollups from the orders tables.",
+    )
+    analytics.add_argument(
+        "--restaurant-id", type=int, help="Only rebuild this restaurant."
+    )
+    analytics.set_defaults(func=rebuild_analytics)
+
+    search = subparsers.add_parser(
+        "rebuild-search",
+        help="Rebuild the full-text search indexes from their base tables.",
+    )
+    search.set_defaults(func=rebuild_search)
+
+    customers = subparsers.add_parser(
+        "customer-analytics",
+        help="Compute analytics for every customer, written as NDJSON.",
+    )
+    customers.add_argument(
+        "--chunk-size", type=int, default=1000, help="Customers per query."
+    )
+    customers.add_argument("--output", help="File to write (default: stdout).")
+    customers.set_defaults(func=customer_analytics)
+
+    seeder = subparsers.add_parser(
+        "seed",
+        help="Bulk-insert synthetic restaurants, customers, orders and reviews.",
+    )
+    seeder.add_argument("--restaurants", type=int, default=100)
+    seeder.add_argument(
+        "--menu-items", type=int, default=25, help="Menu items per restaurant."
+    )
+    seeder.add_argument("--customers", type=int, default=10_000)
+    seeder.add_argument("--orders", type=int, default=100_000)
+    seeder.add_argument("--max-items-per-order", type=int, default=5)
+    seeder.add_argument(
+        "--review-rate",
+        type=float,
+        default=0.3,
+        help="Share of delivered orders that get a review.",
+    )
+    seeder.add_argument(
+        "--days", type=int, default=365, help="Spread orders over this many days."
+    )
+    seeder.add_argument(
+        "--restaurant-skew",
+        type=float,
+        default=1.1,
+        help="Zipf exponent for restaurant popularity (0 = uniform).",
+    )
+    seeder.add_argument(
+        "--customer-skew",
+        type=float,
+        default=0.8,
+        help="Zipf exponent for how often customers reorder (0 = uniform).",
+    )
+    seeder.add_argument(
+        "--item-skew",
+        type=float,
+        default=1.0,
+        help="Zipf exponent for dish popularity within a menu (0 = uniform).",
+    )
+    seeder.add_argument("--seed", type=int, default=42, help="RNG seed.")
+    seeder.add_argument(
+        "--batch-size", type=int, default=20_000, help="Orders per transaction."
+    )
+    seeder.set_defaults(func=seed)
+
+    args = parser.parse_args(argv)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""
+Request metrics in Prometheus text format, served at `GET /metrics`.
+
+`MetricsMiddleware` records, per method and route template, the number
+of requests by status code, server errors (5xx or an unhandled exception)
+and a latency histogram with fixed buckets, plus a gauge of requests in
+flight. Recording is a few dict lookups and a bisect per request; the text
+is only built when `/metrics` is scraped, together with the database
+connection pool gauges.
+
+Latency covers the whole response, so streamed responses (exports, live
+event streams) land in the top buckets for as long as they stay open.
+Requests that match no route share the `route="unmatched"` label, so
+arbitrary URLs can't create new series.
+"""
+
+import time
+from bisect import bisect_left
+from collections import Counter
+
+from .database import engine
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class RouteSeries:
+    """Everything recorded for one (method, route) pair."""
+
+    __slots__ = ("statuses", "errors", "bucket_counts", "latency_sum")
+
+    def __init__(self):
+        self.statuses = Counter()
+        self.errors = 0
+        # One count per bucket plus +Inf, not yet cumulative
+        self.bucket_counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.latency_sum = 0.0
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.series = {}  # (method, route) -> RouteSeries
+        self.in_flight = 0
+
+    def record(self, method: str, route: str, status: int, seconds: float):
+        series = self.series.get((method, route))
+        if series is None:
+            series = self.series[(method, route)] = RouteSeries()
+        series.statuses[status] += 1
+        if status >= 500:
+            series.errors += 1
+        series.bucket_counts[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        series.latency_sum += seconds
+
+    def render(self) -> str:
+        lines = [
+            "# HELP zomato_http_requests_total HTTP requests by route and status.",
+            "# TYPE zomato_http_requests_total counter",
+        ]
+        series = sorted(self.series.items())
+        for (method, route), route_series in series:
+            for status, count in sorted(route_series.statuses.items()):
+                labels = _labels(method=method, route=route, status=status)
+                lines.append(f"zomato_http_requests_total{labels} {count}")
+
+        lines += [
+            "# HELP zomato_http_request_errors_total Requests that failed with a"
+            " 5xx status or an unhandled exception.",
+            "# TYPE zomato_http_request_errors_total counter",
+        ]
+        for (method, route), route_series in series:
+            labels = _labels(method=method, route=route)
+            lines.append(
+                f"zomato_http_request_errors_total{labels} {route_series.errors}"
+            )
+
+        lines += [
+            "# HELP zomato_http_request_duration_seconds Request latency.",
+            "# TYPE zomato_http_request_duration_seconds histogram",
+        ]
+        for (method, route), route_series in series:
+            cumulative = 0
+            for bound, count in zip(
+                LATENCY_BUCKETS + ("+Inf",), route_series.bucket_counts
+            ):
+                cumulative += count
+                labels = _labels(method=method, route=route, le=bound)
+                lines.append(
+                    f"zomato_http_request_duration_seconds_bucket{labels} {cumulative}"
+                )
+            labels = _labels(method=method, route=route)
+            lines.append(
+                f"zomato_http_request_duration_seconds_sum{labels} "
+                f"{route_series.latency_sum:.6f}"
+            )
+            lines.append(
+                f"zomato_http_request_duration_seconds_count{labels} {cumulative}"
+            )
+
+        lines += [
+            "# HELP zomato_http_requests_in_flight Requests currently being served.",
+            "# TYPE zomato_http_requests_in_flight gauge",
+            f"zomato_http_requests_in_flight {self.in_flight}",
+        ]
+        lines += _pool_lines()
+        return "\n".join(lines) + "\n"
+
+
+def _labels(**labels) -> str:
+    escaped = (f'{name}="{_escape(value)}"' for name, value in labels.items())
+    return "{" + ",".join(escaped) + "}"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _pool_lines():
+    pool = engine.pool
+    gauges = {
+        "size": ("Connections the pool keeps open.", pool.size()),
+        "checked_out": ("Connections currently in use.", pool.checkedout()),
+        "checked_in": ("Idle connections in the pool.", pool.checkedin()),
+        # SQLAlchemy reports overflow relative to the pool size; only
+        # connections opened beyond it count here
+        "overflow": ("Connections open beyond the pool size.", max(pool.overflow(), 0)),
+    }
+    lines = []
+    for name, (help_text, value) in gauges.items():
+        lines += [
+            f"# HELP zomato_db_pool_{name} {help_text}",
+            f"# TYPE zomato_db_pool_{name} gauge",
+            f"zomato_db_pool_{name} {value}",
+        ]
+    return lines
+
+
+request_metrics = RequestMetrics()
+
+
+class MetricsMiddleware:
+    """ASGI middleware feeding `request_metrics`."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        request_metrics.in_flight += 1
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        except Exception:
+            status = 500
+            raise
+        finally:
+            request_metrics.in_flight -= 1
+            route = scope.get("route")
+            request_metrics.record(
+                scope["method"],
+                route.path if route is not None else "unmatched",
+                status,
+                time.perf_counter() - start,
+            )
@@ -0,0 +1,188 @@
+"""
+Lightweight, idempotent schema upgrades for existing databases.
+
+`Base.metadata.create_all` only creates missing tables; it never alters
+tables that already exist. Each step here checks the live schema before
+changing it, so the whole list can be run on every startup.
+"""
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from . import models
+from .models import REVIEW_STARS
+from .utils import business_logic
+
+BACKFILL_RATING_COUNTERS = """
+    UPDATE restaurants SET
+        rating_sum = (SELECT COALESCE(SUM(rating), 0) FROM reviews
+                      WHERE reviews.restaurant_id = restaurants.id),
+        rating_count = (SELECT COUNT(id) FROM reviews
+                        WHERE reviews.restaurant_id = restaurants.id)
+"""
+
+BACKFILL_STAR_COUNTS = "UPDATE restaurants SET " + ", ".join(
+    f"rating_{stars}_count = (SELECT COUNT(id) FROM reviews "
+    f"WHERE reviews.restaurant_id = restaurants.id AND reviews.rating = {stars})"
+    for stars in REVIEW_STARS
+)
+
+
+def _add_column_if_missing(conn: Connection, table: str, column: str, ddl: str):
+    """Adds a column using `ddl`, returning True if it had to be created."""
+    columns = {col["name"] for col in inspect(conn).get_columns(table)}
+    if column in columns:
+        return False
+    conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+    return True
+
+
+def _restaurant_rating_counters(conn: Connection):
+    added_sum = _add_column_if_missing(
+        conn, "restaurants", "rating_sum", "INTEGER NOT NULL DEFAULT 0"
+    )
+    added_count = _add_column_if_missing(
+        conn, "restaurants", "rating_count", "INTEGER NOT NULL DEFAULT 0"
+    )
+    if added_sum or added_count:
+        # Backfill the new counters from the reviews already stored
+        conn.execute(text(BACKFILL_RATING_COUNTERS))
+
+
+def _restaurant_star_counts(conn: Connection):
+    added = [
+        _add_column_if_missing(
+            conn, "restaurants", f"rating_{stars}_count", "INTEGER NOT NULL DEFAULT 0"
+        )
+        for stars in REVIEW_STARS
+    ]
+    if any(added):
+        conn.execute(text(BACKFILL_STAR_COUNTS))
+
+
+def _backfill_restaurant_stats(conn: Connection):
+    # create_all makes the rollup tables empty; fill them once from the
+    # existing orders so analytics stay correct for upgraded databases.
+    has_stats = conn.execute(text("SELECT 1 FROM restaurant_stats LIMIT 1")).first()
+    has_restaurants = conn.execute(text("SELECT 1 FROM restaurants LIMIT 1")).first()
+    if has_restaurants and not has_stats:
+        for stmt in business_logic.restaurant_stats_rebuild_statements():
+            conn.execute(stmt)
+
+
+def _backfill_restaurant_time_buckets(conn: Connection):
+    # Either bucket table may be new (they were added at different times)
+    has_buckets = all(
+        conn.execute(text(f"SELECT 1 FROM {table} LIMIT 1")).first()
+        for table in ("restaurant_daily_stats", "restaurant_item_daily_stats")
+    )
+    has_orders = conn.execute(text("SELECT 1 FROM orders LIMIT 1")).first()
+    if has_orders and not has_buckets:
+        for stmt in business_logic.restaurant_time_bucket_rebuild_statements():
+            conn.execute(stmt)
+
+
+def _menu_items_restaurant_index(conn: Connection):
+    conn.execute(
+        text(
+            "CREATE INDEX IF NOT EXISTS ix_menu_items_restaurant_id "
+            "ON menu_items (restaurant_id)"
+        )
+    )
+
+
+# Single-column indexes made redundant by the composite ones in models.py
+SUPERSEDED_INDEXES = ("ix_orders_restaurant_id", "ix_orders_customer_id")
+
+
+def _composite_history_indexes(conn: Connection):
+    for table in (models.Order.__table__, models.Review.__table__):
+        for index in table.indexes:
+            index.create(conn, checkfirst=True)
+    for name in SUPERSEDED_INDEXES:
+        conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+
+
+def _order_previous_status(conn: Connection):
+    _add_column_if_missing(conn, "orders", "previous_status", "VARCHAR(16)")
+
+
+def _version_columns(conn: Connection):
+    # Existing rows start at version 1, like new ones
+    for table in ("restaurants", "menu_items", "orders"):
+        _add_column_if_missing(conn, table, "version", "INTEGER NOT NULL DEFAULT 1")
+
+
+# External-content FTS5 indexes: the text lives in the base tables and
+# triggers mirror every insert/update/delete into the index, so writes from
+# anywhere (ORM, Core bulk inserts, raw SQL) stay searchable.
+FTS_INDEXES = {
+    "restaurants": ("restaurants_fts", ("name", "cuisine", "location")),
+    "menu_items": ("menu_items_fts", ("name", "description")),
+}
+
+
+def _fts_ddl(base: str, fts: str, columns) -> list:
+    cols = ", ".join(columns)
+    new_values = ", ".join(f"new.{c}" for c in columns)
+    old_values = ", ".join(f"old.{c}" for c in columns)
+    insert_new = f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new_values});"
+    delete_old = (
+        f"INSERT INTO {fts}({fts}, rowid, {cols}) "
+        f"VALUES ('delete', old.id, {old_values});"
+    )
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({cols}, "
+        f"content='{base}', content_rowid='id', "
+        f"tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {base} "
+        f"BEGIN {insert_new} END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {base} "
+        f"BEGIN {delete_old} END",
+        # Only text changes touch the index, not e.g. rating updates
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {cols} ON {base} "
+        f"BEGIN {delete_old} {insert_new} END",
+    ]
+
+
+def rebuild_fts_statements() -> list:
+    """Statements that rebuild every FTS index from its base table."""
+    return [
+        text(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+        for fts, _ in FTS_INDEXES.values()
+    ]
+
+
+def _full_text_search_indexes(conn: Connection):
+    existing = set(inspect(conn).get_table_names())
+    for base, (fts, columns) in FTS_INDEXES.items():
+        for ddl in _fts_ddl(base, fts, columns):
+            conn.execute(text(ddl))
+        if fts not in existing:
+            # Index whatever rows were stored before the index existed
+            conn.execute(text(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')"))
+
+
+MIGRATIONS = [
+    _restaurant_rating_counters,
+    _backfill_restaurant_stats,
+    _menu_items_restaurant_index,
+    _full_text_search_indexes,
+    _version_columns,
+    _restaurant_star_counts,
+    _backfill_restaurant_time_buckets,
+    _order_previous_status,
+    _composite_history_indexes,
+]
+
+
+def _apply_migrations(conn: Connection):
+    for migration in MIGRATIONS:
+        migration(conn)
+
+
+async def run_migrations(engine: AsyncEngine):
+    """Applies every migration step in order inside one transaction."""
+    async with engine.begin() as conn:
+        await conn.run_sync(_apply_migrations)
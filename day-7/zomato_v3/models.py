@@ -4,13 +4,15 @@ from sqlalchemy import (
     Column,
     Integer,
     String,
+    Date,
     DateTime,
     Float,
     ForeignKey,
     Enum,
+    Index,
 )
 from sqlalchemy.orm import relationship
-from sqlalchemy.sql import func
+from sqlalchemy.sql import column, func, table
 from .database import Base
 
 
@@ -24,6 +26,34 @@ class OrderStatus(enum.Enum):
     cancelled = "cancelled"
 
 
+# The order lifecycle, as the statuses an order may move to each status
+# from. Orders only move forward along ORDER_STATUS_FLOW (steps may be
+# skipped) and can be cancelled until they are out for delivery; delivered
+# and cancelled are final.
+ORDER_STATUS_FLOW = (
+    OrderStatus.placed,
+    OrderStatus.confirmed,
+    OrderStatus.preparing,
+    OrderStatus.out_for_delivery,
+    OrderStatus.delivered,
+)
+ORDER_STATUS_PREDECESSORS = {
+    **{
+        status: ORDER_STATUS_FLOW[:position]
+        for position, status in enumerate(ORDER_STATUS_FLOW)
+    },
+    OrderStatus.cancelled: (
+        OrderStatus.placed,
+        OrderStatus.confirmed,
+        OrderStatus.preparing,
+    ),
+}
+
+
+# Valid review ratings
+REVIEW_STARS = (1, 2, 3, 4, 5)
+
+
 # Association table for Order <-> MenuItem (Many-to-Many with payload)
 class OrderItem(Base):
     __tablename__ = "order_items"
@@ -41,14 +71,29 @@ class OrderItem(Base):
 
 class Restaurant(Base):
     __tablename__ = "restaurants"
+    # Return created_at/updated_at from the INSERT/UPDATE itself; objects
+    # can't be lazily refreshed under AsyncSession.
+    __mapper_args__ = {"eager_defaults": True}
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, index=True, nullable=False)
     location = Column(String, index=True)
     cuisine = Column(String, index=True)
     rating = Column(Float, default=0.0)
+    # Running totals of review ratings; `rating` is kept as sum / count
+    rating_sum = Column(Integer, nullable=False, default=0, server_default="0")
+    rating_count = Column(Integer, nullable=False, default=0, server_default="0")
+    # Reviews per star rating, named "rating_<stars>_count"
+    rating_1_count = Column(Integer, nullable=False, default=0, server_default="0")
+    rating_2_count = Column(Integer, nullable=False, default=0, server_default="0")
+    rating_3_count = Column(Integer, nullable=False, default=0, server_default="0")
+    rating_4_count = Column(Integer, nullable=False, default=0, server_default="0")
+    rating_5_count = Column(Integer, nullable=False, default=0, server_default="0")
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    # Bumped by every write that changes the restaurant detail payload (its
+    # row, rating or menu); the basis of its ETag (see conditional.py)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
 
     menu_items = relationship(
         "MenuItem", back_populates="restaurant", cascade="all, delete-orphan"
@@ -56,6 +101,10 @@ class Restaurant(Base):
     orders = relationship("Order", back_populates="restaurant")
     reviews = relationship("Review", back_populates="restaurant")
 
+    @staticmethod
+    def star_column(stars: int):
+        return getattr(Restaurant, f"rating_{stars}_count")
+
 
 class MenuItem(Base):
     __tablename__ = "menu_items"
@@ -65,13 +114,17 @@ class MenuItem(Base):
     description = Column(String)
     price = Column(Float, nullable=False)
     is_available = Column(Boolean, default=True)
-    restaurant_id = Column(Integer, ForeignKey("restaurants.id"), nullable=False)
+    restaurant_id = Column(
+        Integer, ForeignKey("restaurants.id"), nullable=False, index=True
+    )
+    version = Column(Integer, nullable=False, default=1, server_default="1")
 
     restaurant = relationship("Restaurant", back_populates="menu_items")
 
 
 class Customer(Base):
     __tablename__ = "customers"
+    __mapper_args__ = {"eager_defaults": True}
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False)
@@ -88,20 +141,38 @@ class Customer(Base):
 
 class Order(Base):
     __tablename__ = "orders"
+    # Order history is listed newest first per restaurant (optionally by
+    # status and date range) and per customer. SQLite appends the rowid to
+    # every index entry, so these also cover the `order_date, id` sort, and
+    # their leading column serves plain restaurant/customer lookups.
+    __table_args__ = (
+        Index("ix_orders_restaurant_date", "restaurant_id", "order_date"),
+        Index(
+            "ix_orders_restaurant_status_date",
+            "restaurant_id",
+            "order_status",
+            "order_date",
+        ),
+        Index("ix_orders_customer_date", "customer_id", "order_date"),
+    )
+    # Fetch server-generated columns (order_date) in the INSERT itself so a
+    # freshly placed order can be serialized without a refresh.
+    __mapper_args__ = {"eager_defaults": True}
 
     id = Column(Integer, primary_key=True, index=True)
-    customer_id = Column(
-        Integer, ForeignKey("customers.id"), nullable=False, index=True
-    )
-    restaurant_id = Column(
-        Integer, ForeignKey("restaurants.id"), nullable=False, index=True
-    )
+    customer_id = Column(Integer, ForeignKey("customers.id"), nullable=False)
+    restaurant_id = Column(Integer, ForeignKey("restaurants.id"), nullable=False)
     order_status = Column(Enum(OrderStatus), default=OrderStatus.placed)
+    # The status before the last transition, set by the same UPDATE that
+    # changes order_status (see crud.update_order_status)
+    previous_status = Column(Enum(OrderStatus), nullable=True)
     total_amount = Column(Float, nullable=False)
     delivery_address = Column(String, nullable=False)
     special_instructions = Column(String, nullable=True)
     order_date = Column(DateTime(timezone=True), server_default=func.now())
     delivery_time = Column(DateTime(timezone=True), nullable=True)
+    # Bumped on status changes and when the order's review changes
+    version = Column(Integer, nullable=False, default=1, server_default="1")
 
     customer = relationship("Customer", back_populates="orders")
     restaurant = relationship("Restaurant", back_populates="orders")
@@ -115,6 +186,10 @@ class Order(Base):
 
 class Review(Base):
     __tablename__ = "reviews"
+    # The restaurant_id index serves the newest-first listing (by id); this
+    # one the highest/lowest rating sorts
+    __table_args__ = (Index("ix_reviews_restaurant_rating", "restaurant_id", "rating"),)
+    __mapper_args__ = {"eager_defaults": True}
 
     id = Column(Integer, primary_key=True, index=True)
     customer_id = Column(
@@ -133,3 +208,94 @@ class Review(Base):
     customer = relationship("Customer", back_populates="reviews")
     restaurant = relationship("Restaurant", back_populates="reviews")
     order = relationship("Order", back_populates="review")
+
+
+# Per-restaurant analytics rollup, maintained incrementally as orders are
+# placed and change status (see crud.record_order_placed and
+# crud.update_order_status). Rebuilt from scratch by
+# business_logic.rebuild_restaurant_stats.
+class RestaurantStats(Base):
+    __tablename__ = "restaurant_stats"
+
+    restaurant_id = Column(Integer, ForeignKey("restaurants.id"), primary_key=True)
+    delivered_revenue = Column(Float, nullable=False, default=0.0)
+    total_orders = Column(Integer, nullable=False, default=0)
+    # One counter per OrderStatus, named "<status>_orders"
+    placed_orders = Column(Integer, nullable=False, default=0)
+    confirmed_orders = Column(Integer, nullable=False, default=0)
+    preparing_orders = Column(Integer, nullable=False, default=0)
+    out_for_delivery_orders = Column(Integer, nullable=False, default=0)
+    delivered_orders = Column(Integer, nullable=False, default=0)
+    cancelled_orders = Column(Integer, nullable=False, default=0)
+
+    @staticmethod
+    def status_column(status: OrderStatus):
+        return getattr(RestaurantStats, f"{status.value}_orders")
+
+
+# Total quantity sold per menu item, keyed by id so renamed items keep
+# their history.
+class RestaurantItemStats(Base):
+    __tablename__ = "restaurant_item_stats"
+    __table_args__ = (
+        Index(
+            "ix_restaurant_item_stats_restaurant_quantity",
+            "restaurant_id",
+            "quantity_sold",
+        ),
+    )
+
+    menu_item_id = Column(Integer, ForeignKey("menu_items.id"), primary_key=True)
+    restaurant_id = Column(Integer, ForeignKey("restaurants.id"), nullable=False)
+    quantity_sold = Column(Integer, nullable=False, default=0)
+
+    menu_item = relationship("MenuItem")
+
+
+# Quantity sold per menu item per UTC day, for rolling-window popularity
+# (e.g. the last 7 days) without scanning order history.
+class RestaurantItemDailyStats(Base):
+    __tablename__ = "restaurant_item_daily_stats"
+    __table_args__ = (
+        Index("ix_restaurant_item_daily_stats_restaurant_day", "restaurant_id", "day"),
+    )
+
+    menu_item_id = Column(Integer, ForeignKey("menu_items.id"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    restaurant_id = Column(Integer, ForeignKey("restaurants.id"), nullable=False)
+    quantity_sold = Column(Integer, nullable=False, default=0)
+
+
+# Per-restaurant order counts and delivered revenue bucketed by the UTC day
+# (and hour) the orders were placed, for time-series charts. Maintained
+# incrementally alongside RestaurantStats: placing an order bumps the
+# current buckets, and status changes adjust the bucket of the order's
+# placement time, so past days settle once their orders are done.
+class RestaurantDailyStats(Base):
+    __tablename__ = "restaurant_daily_stats"
+
+    restaurant_id = Column(Integer, ForeignKey("restaurants.id"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    total_orders = Column(Integer, nullable=False, default=0)
+    delivered_orders = Column(Integer, nullable=False, default=0)
+    cancelled_orders = Column(Integer, nullable=False, default=0)
+    delivered_revenue = Column(Float, nullable=False, default=0.0)
+
+
+class RestaurantHourlyStats(Base):
+    __tablename__ = "restaurant_hourly_stats"
+
+    restaurant_id = Column(Integer, ForeignKey("restaurants.id"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    hour = Column(Integer, primary_key=True)  # 0-23, UTC
+    total_orders = Column(Integer, nullable=False, default=0)
+    delivered_orders = Column(Integer, nullable=False, default=0)
+    cancelled_orders = Column(Integer, nullable=False, default=0)
+    delivered_revenue = Column(Float, nullable=False, default=0.0)
+
+
+# FTS5 full-text indexes over restaurants and menu items. These are SQLite
+# virtual tables created (with their sync triggers) by migrations.py, not by
+# create_all; these handles are only used to reference them in queries.
+restaurants_fts = table("restaurants_fts", column("rowid"))
+menu_items_fts = table("menu_items_fts", column("rowid"))
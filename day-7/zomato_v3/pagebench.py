@@ -0,0 +1,108 @@
+"""
+Deep-page benchmark for the cursor-paginated list endpoints.
+
+Run from the directory containing the `zomato_v3` package, against a
+seeded database, e.g.:
+
+    ZOMATO_DATABASE_URL=sqlite+aiosqlite:///./bench.db \
+        python -m zomato_v3.manage seed --customers 200000 --orders 200000
+    ZOMATO_DATABASE_URL=sqlite+aiosqlite:///./bench.db \
+        python -m zomato_v3.pagebench --page 10000 --limit 10
+
+For each endpoint, times page 1, then the deep page fetched with
+`skip`/`limit` (OFFSET) and with the `cursor` a client paging through
+would hold at that point. The cursor comes from the `X-Next-Cursor` header
+of the page before it, fetched once with `skip`. The app runs in-process
+through httpx's ASGI transport, so the numbers are request latency without
+the network. Prints a JSON report of median and p95 milliseconds.
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+
+import httpx
+
+from .loadtest import percentile
+from .pagination import NEXT_CURSOR_HEADER
+
+ENDPOINTS = ["/customers/", "/menu-items/", "/reviews/", "/restaurants/"]
+
+
+async def time_request(client, path: str, params: dict, repeat: int) -> dict:
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        response = await client.get(path, params=params)
+        latencies.append(time.perf_counter() - start)
+        response.raise_for_status()
+    latencies.sort()
+    return {
+        "rows": len(response.json()),
+        "p50_ms": round(percentile(latencies, 50) * 1e3, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1e3, 2),
+    }
+
+
+async def bench_endpoint(client, path: str, page: int, limit: int, repeat: int):
+    """Page 1 and page `page` of `path`, or None if it has fewer pages."""
+    previous = await client.get(
+        path, params={"skip": (page - 2) * limit, "limit": limit}
+    )
+    previous.raise_for_status()
+    cursor = previous.headers.get(NEXT_CURSOR_HEADER)
+    if not cursor:
+        return None
+    return {
+        "page": page,
+        "first_page": await time_request(client, path, {"limit": limit}, repeat),
+        "offset": await time_request(
+            client, path, {"skip": (page - 1) * limit, "limit": limit}, repeat
+        ),
+        "cursor": await time_request(
+            client, path, {"cursor": cursor, "limit": limit}, repeat
+        ),
+    }
+
+
+async def run(args) -> dict:
+    from .database import engine
+    from .main import app, create_tables
+
+    await create_tables()
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://zomato", timeout=600
+        ) as client:
+            report = {}
+            for path in args.endpoints:
+                result = await bench_endpoint(
+                    client, path, args.page, args.limit, args.repeat
+                )
+                report[path] = result or f"fewer than {args.page} pages"
+            return report
+    finally:
+        await engine.dispose()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--page", type=int, default=10_000, help="deep page number")
+    parser.add_argument("--limit", type=int, default=10, help="rows per page")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument(
+        "--endpoints", nargs="+", default=ENDPOINTS, choices=ENDPOINTS, metavar="PATH"
+    )
+    args = parser.parse_args(argv)
+    if args.page < 2 or args.limit < 1 or args.repeat < 1:
+        parser.error("--page must be at least 2; --limit and --repeat positive")
+
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
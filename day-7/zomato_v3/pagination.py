@@ -0,0 +1,86 @@
+"""
+Keyset (cursor) pagination helpers.
+
+Pages are ordered by `(sort_key, id)` and the opaque cursor encodes the
+last row's key values, so fetching page N costs the same as page 1: the
+database seeks straight to the cursor position through an index instead of
+scanning and discarding rows like OFFSET does.
+"""
+
+import base64
+import binascii
+import json
+from typing import Any, List, NamedTuple, Optional, Sequence
+
+from sqlalchemy import Select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Response header carrying the cursor for the next page
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class Page(NamedTuple):
+    items: List[Any]
+    next_cursor: Optional[str]
+
+
+def encode_cursor(values) -> str:
+    payload = json.dumps(list(values), separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> list:
+    """Returns the key values in `cursor`; raises ValueError if malformed."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded))
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError("Invalid pagination cursor.")
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError("Invalid pagination cursor.")
+    # Key values are strings or numbers; anything else (objects, lists,
+    # null, booleans) can't have come from `encode_cursor`
+    for value in values:
+        if isinstance(value, bool) or not isinstance(value, (str, int, float)):
+            raise ValueError("Invalid pagination cursor.")
+    return values
+
+
+async def paginate(
+    db: AsyncSession,
+    stmt: Select,
+    keys: Sequence,
+    limit: int,
+    skip: int = 0,
+    cursor: Optional[str] = None,
+    descending: bool = False,
+) -> Page:
+    """
+    Returns one page of the entities selected by `stmt`, ordered by the
+    `keys` columns, the last of which must be the unique id
+    (e.g. `(Restaurant.name, Restaurant.id)`). All keys sort ascending, or
+    all descending with `descending=True`.
+
+    With a cursor, rows after the cursor position are returned and `skip`
+    is ignored; without one, `skip` falls back to a plain OFFSET for
+    backwards compatibility. Key columns must be non-nullable and hold
+    JSON-serializable values (strings or numbers). Raises ValueError for a
+    malformed cursor or a `limit` below 1.
+    """
+    if limit < 1:
+        raise ValueError("limit must be at least 1.")
+    if cursor:
+        values = decode_cursor(cursor, len(keys))
+        position, after = tuple_(*keys), tuple_(*values)
+        stmt = stmt.where(position < after if descending else position > after)
+    stmt = stmt.order_by(*(key.desc() if descending else key for key in keys))
+    if skip and not cursor:
+        stmt = stmt.offset(skip)
+
+    # Fetch one extra row to find out whether there is a next page
+    rows = (await db.scalars(stmt.limit(limit + 1))).all()
+    if len(rows) <= limit:
+        return Page(rows, None)
+    rows = rows[:limit]
+    last = rows[-1]
+    return Page(rows, encode_cursor(getattr(last, key.key) for key in keys))
@@ -0,0 +1,55 @@
+from fastapi import APIRouter, Query
+
+from .. import cache, events, instrumentation, schemas
+
+router = APIRouter(
+    prefix="/admin",
+    tags=["Admin"],
+)
+
+
+@router.get("/cache", response_model=dict)
+async def read_cache_stats():
+    """
+    Hit/miss/eviction counters and current size of each in-process cache.
+    """
+    return {c.name: c.stats() for c in cache.CACHES}
+
+
+@router.get("/events", response_model=dict)
+async def read_event_stats():
+    """
+    Open live-update streams and how many events slow subscribers dropped.
+    """
+    return events.broker.stats()
+
+
+@router.get("/queries", response_model=dict)
+async def read_query_stats():
+    """
+    SQL statements and database time per request, averaged and maxed per
+    route since startup (or the last reset).
+    """
+    return instrumentation.route_query_stats.stats()
+
+
+@router.delete("/queries", status_code=204)
+async def reset_query_stats():
+    instrumentation.route_query_stats.clear()
+
+
+@router.get("/slow-queries", response_model=list)
+async def read_slow_queries(
+    sort: schemas.SlowQuerySort = schemas.SlowQuerySort.total,
+    limit: int = Query(20, ge=1, le=200),
+):
+    """
+    Statements that crossed the slow-query threshold, worst first by total
+    or by single-run time, with their latest parameters and query plan.
+    """
+    return instrumentation.slow_query_log.worst(limit=limit, key=f"{sort.value}_ms")
+
+
+@router.delete("/slow-queries", status_code=204)
+async def reset_slow_queries():
+    instrumentation.slow_query_log.clear()
@@ -1,9 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
 
 from .. import crud, schemas
 from ..database import get_db
+from ..pagination import NEXT_CURSOR_HEADER
 from ..utils import business_logic
 
 router = APIRouter(
@@ -14,55 +15,102 @@ router = APIRouter(
 
 
 @router.post("/", response_model=schemas.Customer, status_code=201)
-def create_customer(customer: schemas.CustomerCreate, db: Session = Depends(get_db)):
-    db_customer = crud.get_customer_by_email(db, email=customer.email)
+async def create_customer(
+    customer: schemas.CustomerCreate, db: AsyncSession = Depends(get_db)
+):
+    db_customer = await crud.get_customer_by_email(db, email=customer.email)
     if db_customer:
         raise HTTPException(status_code=400, detail="Email already registered")
-    return crud.create_customer(db=db, customer=customer)
+    return await crud.create_customer(db=db, customer=customer)
 
 
 @router.get("/", response_model=List[schemas.Customer])
-def read_customers(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    return crud.get_customers(db, skip=skip, limit=limit)
+async def read_customers(
+    response: Response,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(
+        None, description="Opaque cursor from the X-Next-Cursor header"
+    ),
+    db: AsyncSession = Depends(get_db),
+):
+    try:
+        page = await crud.get_customers(db, skip=skip, limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if page.next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = page.next_cursor
+    return page.items
 
 
 @router.get("/{customer_id}", response_model=schemas.Customer)
-def read_customer(customer_id: int, db: Session = Depends(get_db)):
-    db_customer = crud.get_customer(db, customer_id=customer_id)
+async def read_customer(customer_id: int, db: AsyncSession = Depends(get_db)):
+    db_customer = await crud.get_customer(db, customer_id=customer_id)
     if db_customer is None:
         raise HTTPException(status_code=404, detail="Customer not found")
     return db_customer
 
 
+@router.get("/{customer_id}/analytics", response_model=schemas.CustomerAnalytics)
+async def read_customer_analytics(customer_id: int, db: AsyncSession = Depends(get_db)):
+    """
+    Total (delivered) spend, order count, and the customer's most-ordered
+    restaurant and cuisine.
+    """
+    analytics = await business_logic.get_customer_analytics(db, customer_id)
+    if analytics is None:
+        raise HTTPException(status_code=404, detail="Customer not found")
+    return analytics
+
+
 @router.post("/{customer_id}/orders/", response_model=schemas.Order, status_code=201)
-def place_new_order_for_customer(
-    customer_id: int, order: schemas.OrderCreate, db: Session = Depends(get_db)
+async def place_new_order_for_customer(
+    customer_id: int, order: schemas.OrderCreate, db: AsyncSession = Depends(get_db)
 ):
-    db_customer = crud.get_customer(db, customer_id)
+    db_customer = await crud.get_customer(db, customer_id)
     if not db_customer:
         raise HTTPException(status_code=404, detail="Customer not found")
     try:
-        created_order = business_logic.calculate_and_create_order(
-            db, order_data=order, customer_id=customer_id
+        # The customer is passed through so the address fallback doesn't
+        # reload it, and the response is built without re-fetching the order.
+        return await business_logic.calculate_and_create_order(
+            db, order_data=order, customer=db_customer
         )
-        return crud.get_order(
-            db, created_order.id
-        )  # Re-fetch to load all relationships
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
 @router.get("/{customer_id}/orders", response_model=List[schemas.Order])
-def read_customer_order_history(customer_id: int, db: Session = Depends(get_db)):
-    db_customer = crud.get_customer(db, customer_id)
+async def read_customer_order_history(
+    customer_id: int,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=200),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    A customer's orders, newest first, paged with `skip`/`limit`.
+    """
+    db_customer = await crud.get_customer(db, customer_id)
     if not db_customer:
         raise HTTPException(status_code=404, detail="Customer not found")
-    return crud.get_customer_orders(db, customer_id=customer_id)
+    return await crud.get_customer_orders(
+        db, customer_id=customer_id, skip=skip, limit=limit
+    )
 
 
 @router.get("/{customer_id}/reviews", response_model=List[schemas.Review])
-def read_customer_reviews(customer_id: int, db: Session = Depends(get_db)):
-    db_customer = crud.get_customer(db, customer_id)
+async def read_customer_reviews(
+    customer_id: int,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=200),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    A customer's reviews, newest first, paged with `skip`/`limit`.
+    """
+    db_customer = await crud.get_customer(db, customer_id)
     if not db_customer:
         raise HTTPException(status_code=404, detail="Customer not found")
-    return crud.get_customer_reviews(db, customer_id=customer_id)
+    return await crud.get_customer_reviews(
+        db, customer_id=customer_id, skip=skip, limit=limit
+    )
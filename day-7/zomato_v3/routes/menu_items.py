@@ -1,9 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
 
 from .. import crud, schemas
+from ..conditional import (
+    REVALIDATE,
+    etag_matches,
+    make_etag,
+    not_modified,
+    set_validators,
+)
 from ..database import get_db
+from ..pagination import NEXT_CURSOR_HEADER
 
 router = APIRouter(
     prefix="/menu-items",
@@ -13,44 +21,72 @@ router = APIRouter(
 
 
 @router.get("/", response_model=List[schemas.MenuItem])
-def read_all_menu_items(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+async def read_all_menu_items(
+    response: Response,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(
+        None, description="Opaque cursor from the X-Next-Cursor header"
+    ),
+    db: AsyncSession = Depends(get_db),
+):
     """
-    Retrieve all menu items across all restaurants.
+    Retrieve all menu items across all restaurants, grouped by restaurant.
     """
-    items = crud.get_menu_items(db, skip=skip, limit=limit)
-    return items
+    try:
+        page = await crud.get_menu_items(db, skip=skip, limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if page.next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = page.next_cursor
+    return page.items
 
 
 @router.get("/{item_id}", response_model=schemas.MenuItem)
-def read_menu_item(item_id: int, db: Session = Depends(get_db)):
+async def read_menu_item(
+    item_id: int,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
+):
     """
-    Retrieve a specific menu item by its ID.
+    Retrieve a specific menu item by its ID. Honors If-None-Match.
     """
-    db_item = crud.get_menu_item(db, item_id=item_id)
-    if db_item is None:
+    if request.headers.get("if-none-match"):
+        version = await crud.get_menu_item_detail_version(db, item_id)
+        if version is not None:
+            etag = make_etag("menu-item", item_id, version)
+            if etag_matches(request, etag):
+                return not_modified(etag, REVALIDATE)
+
+    detail = await crud.get_menu_item_detail(db, item_id=item_id)
+    if detail is None:
         raise HTTPException(status_code=404, detail="Menu Item not found")
-    return db_item
+    set_validators(
+        response, make_etag("menu-item", item_id, detail.version), REVALIDATE
+    )
+    return detail.payload
 
 
 @router.put("/{item_id}", response_model=schemas.MenuItem)
-def update_menu_item(
-    item_id: int, item: schemas.MenuItemUpdate, db: Session = Depends(get_db)
+async def update_menu_item(
+    item_id: int, item: schemas.MenuItemUpdate, db: AsyncSession = Depends(get_db)
 ):
     """
     Update a menu item's details.
     """
-    db_item = crud.update_menu_item(db, item_id=item_id, item=item)
+    db_item = await crud.update_menu_item(db, item_id=item_id, item=item)
     if db_item is None:
         raise HTTPException(status_code=404, detail="Menu Item not found")
     return db_item
 
 
 @router.delete("/{item_id}", response_model=schemas.MenuItem)
-def delete_menu_item(item_id: int, db: Session = Depends(get_db)):
+async def delete_menu_item(item_id: int, db: AsyncSession = Depends(get_db)):
     """
     Delete a menu item.
     """
-    db_item = crud.delete_menu_item(db, item_id=item_id)
+    db_item = await crud.delete_menu_item(db, item_id=item_id)
     if db_item is None:
         raise HTTPException(status_code=404, detail="Menu Item not found")
     return db_item
@@ -1,8 +1,18 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from .. import crud, models, schemas
-from ..database import get_db
-from ..utils import business_logic
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Union
+from .. import crud, events, models, schemas
+from ..conditional import (
+    PRIVATE_REVALIDATE,
+    TERMINAL_ORDER,
+    etag_matches,
+    make_etag,
+    not_modified,
+    set_validators,
+)
+from ..database import AsyncSessionLocal, get_db
 
 router = APIRouter(
     prefix="/orders",
@@ -11,33 +21,119 @@ router = APIRouter(
 )
 
 
+TERMINAL_STATUSES = (models.OrderStatus.delivered, models.OrderStatus.cancelled)
+
+# The status update returns one of two shapes. Validating against the
+# Union response_model would try both models on every response, so the
+# route serializes through the matching adapter and returns the bytes.
+_ORDER_ADAPTER = TypeAdapter(schemas.Order)
+_STATUS_CHANGE_ADAPTER = TypeAdapter(schemas.OrderStatusChange)
+
+
+def _json_response(adapter: TypeAdapter, obj) -> Response:
+    value = adapter.validate_python(obj, from_attributes=True)
+    return Response(adapter.dump_json(value), media_type="application/json")
+
+
+def _order_cache_control(status: models.OrderStatus) -> str:
+    if status in TERMINAL_STATUSES:
+        return TERMINAL_ORDER
+    return PRIVATE_REVALIDATE
+
+
 @router.get("/{order_id}", response_model=schemas.Order)
-def read_order_details(order_id: int, db: Session = Depends(get_db)):
-    db_order = crud.get_order(db, order_id=order_id)
+async def read_order_details(
+    order_id: int,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
+):
+    if request.headers.get("if-none-match"):
+        # One primary-key lookup instead of loading the whole order graph
+        versions = await crud.get_order_versions(db, order_id)
+        if versions is not None:
+            etag = make_etag(
+                "order", order_id, versions.version, versions.restaurant_version
+            )
+            if etag_matches(request, etag):
+                return not_modified(etag, _order_cache_control(versions.order_status))
+
+    db_order = await crud.get_order(db, order_id=order_id)
     if db_order is None:
         raise HTTPException(status_code=404, detail="Order not found")
+    set_validators(
+        response,
+        make_etag("order", order_id, db_order.version, db_order.restaurant.version),
+        _order_cache_control(db_order.order_status),
+    )
     return db_order
 
 
-@router.put("/{order_id}/status", response_model=schemas.Order)
-def update_order_status(
+@router.get("/{order_id}/events")
+async def stream_order_events(
+    order_id: int, db: AsyncSession = Depends(get_db, scope="function")
+):
+    """
+    Server-sent events for the order: its current status first, then an
+    `order_status` event for every change. Ends once the order is delivered
+    or cancelled.
+    """
+    if await crud.get_order_versions(db, order_id) is None:
+        raise HTTPException(status_code=404, detail="Order not found")
+
+    async def current_status():
+        # The lookup session above is closed before the stream starts
+        async with AsyncSessionLocal() as session:
+            row = await crud.get_order_status(session, order_id)
+        return events.order_event("order_status", row) if row else None
+
+    return StreamingResponse(
+        events.stream(
+            events.order_topic(order_id),
+            snapshot=current_status,
+            until=lambda event: models.OrderStatus(event["order_status"])
+            in TERMINAL_STATUSES,
+        ),
+        media_type="text/event-stream",
+        headers=events.SSE_HEADERS,
+    )
+
+
+@router.put(
+    "/{order_id}/status",
+    response_model=Union[schemas.Order, schemas.OrderStatusChange],
+)
+async def update_order_status(
     order_id: int,
     status_update: schemas.OrderStatusUpdate,
-    db: Session = Depends(get_db),
+    slim: bool = Query(
+        False, description="Return only the status change, not the full order"
+    ),
+    db: AsyncSession = Depends(get_db),
 ):
-    updated_order = crud.update_order_status(
-        db, order_id=order_id, status=status_update.status
-    )
-    if updated_order is None:
+    """
+    Move an order along its lifecycle (placed -> confirmed -> preparing ->
+    out_for_delivery -> delivered; steps may be skipped, and it can be
+    cancelled until it is out for delivery).
+    """
+    try:
+        change = await crud.update_order_status(
+            db, order_id=order_id, status=status_update.status
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if change is None:
         raise HTTPException(status_code=404, detail="Order not found")
-    return crud.get_order(db, updated_order.id)
+    if slim:
+        return _json_response(_STATUS_CHANGE_ADAPTER, change)
+    return _json_response(_ORDER_ADAPTER, await crud.get_order(db, order_id))
 
 
 @router.post("/{order_id}/review", response_model=schemas.Review, status_code=201)
-def add_review_for_order(
-    order_id: int, review: schemas.ReviewCreate, db: Session = Depends(get_db)
+async def add_review_for_order(
+    order_id: int, review: schemas.ReviewCreate, db: AsyncSession = Depends(get_db)
 ):
-    db_order = crud.get_order(db, order_id=order_id)
+    db_order = await crud.get_order(db, order_id=order_id)
     if db_order is None:
         raise HTTPException(status_code=404, detail="Order not found")
     if db_order.order_status != models.OrderStatus.delivered:
@@ -47,7 +143,8 @@ def add_review_for_order(
             status_code=400, detail="A review for this order already exists."
         )
 
-    created_review = crud.create_order_review(
+    # Creating the review also folds its rating into the restaurant's average
+    created_review = await crud.create_order_review(
         db,
         review=review,
         order_id=order_id,
@@ -55,7 +152,4 @@ def add_review_for_order(
         restaurant_id=db_order.restaurant_id,
     )
 
-    # After adding a review, update the restaurant's average rating
-    business_logic.update_restaurant_rating(db, restaurant_id=db_order.restaurant_id)
-
     return created_review
@@ -1,10 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from datetime import date
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 
-from .. import crud, models, schemas
+from .. import crud, events, models, schemas
+from ..conditional import (
+    REVALIDATE,
+    etag_matches,
+    make_etag,
+    not_modified,
+    set_validators,
+)
 from ..database import get_db
-from ..utils import business_logic
+from ..dependencies import get_restaurant_or_404, get_streamed_restaurant_or_404
+from ..pagination import NEXT_CURSOR_HEADER
+from ..utils import business_logic, exports
 
 router = APIRouter(
     prefix="/restaurants",
@@ -14,69 +25,230 @@ router = APIRouter(
 
 
 @router.post("/", response_model=schemas.Restaurant, status_code=201)
-def create_restaurant(
-    restaurant: schemas.RestaurantCreate, db: Session = Depends(get_db)
+async def create_restaurant(
+    restaurant: schemas.RestaurantCreate, db: AsyncSession = Depends(get_db)
 ):
-    return crud.create_restaurant(db=db, restaurant=restaurant)
+    return await crud.create_restaurant(db=db, restaurant=restaurant)
 
 
 @router.get("/", response_model=List[schemas.Restaurant])
-def read_restaurants(
-    skip: int = 0,
-    limit: int = 10,
+async def read_restaurants(
+    response: Response,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(10, ge=1, le=100),
     cuisine: Optional[str] = Query(None, description="Filter by cuisine type"),
     min_rating: Optional[float] = Query(
         None, ge=0, le=5, description="Filter by minimum rating"
     ),
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = Query(
+        None, description="Opaque cursor from the X-Next-Cursor header"
+    ),
+    db: AsyncSession = Depends(get_db),
 ):
-    restaurants = crud.get_restaurants(
-        db, skip=skip, limit=limit, cuisine=cuisine, min_rating=min_rating
-    )
-    return restaurants
+    """
+    List restaurants ordered by name. Pass the `X-Next-Cursor` response
+    header back as `cursor` to fetch the next page.
+    """
+    try:
+        page = await crud.get_restaurants(
+            db,
+            skip=skip,
+            limit=limit,
+            cuisine=cuisine,
+            min_rating=min_rating,
+            cursor=cursor,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if page.next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = page.next_cursor
+    return page.items
 
 
 @router.get("/{restaurant_id}", response_model=schemas.Restaurant)
-def read_restaurant(restaurant_id: int, db: Session = Depends(get_db)):
-    db_restaurant = crud.get_restaurant(db, restaurant_id=restaurant_id)
-    if db_restaurant is None:
+async def read_restaurant(
+    restaurant_id: int,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Restaurant detail with its menu. Send the ETag back as If-None-Match to
+    get a 304 when nothing changed, without the menu being loaded.
+    """
+    if request.headers.get("if-none-match"):
+        version = await crud.get_restaurant_detail_version(db, restaurant_id)
+        if version is not None:
+            etag = make_etag("restaurant", restaurant_id, version)
+            if etag_matches(request, etag):
+                return not_modified(etag, REVALIDATE)
+
+    detail = await crud.get_restaurant_detail(db, restaurant_id=restaurant_id)
+    if detail is None:
         raise HTTPException(status_code=404, detail="Restaurant not found")
-    return db_restaurant
+    set_validators(
+        response, make_etag("restaurant", restaurant_id, detail.version), REVALIDATE
+    )
+    return detail.payload
 
 
 @router.post(
     "/{restaurant_id}/menu-items/", response_model=schemas.MenuItem, status_code=201
 )
-def create_menu_item_for_restaurant(
-    restaurant_id: int, item: schemas.MenuItemCreate, db: Session = Depends(get_db)
+async def create_menu_item_for_restaurant(
+    item: schemas.MenuItemCreate,
+    db_restaurant: models.Restaurant = Depends(get_restaurant_or_404),
+    db: AsyncSession = Depends(get_db),
 ):
-    db_restaurant = crud.get_restaurant(db, restaurant_id)
-    if not db_restaurant:
-        raise HTTPException(status_code=404, detail="Restaurant not found")
-    return crud.create_restaurant_menu_item(
-        db=db, item=item, restaurant_id=restaurant_id
+    return await crud.create_restaurant_menu_item(
+        db=db, item=item, restaurant_id=db_restaurant.id
     )
 
 
 @router.get("/{restaurant_id}/orders", response_model=List[schemas.Order])
-def get_restaurant_orders_history(restaurant_id: int, db: Session = Depends(get_db)):
-    db_restaurant = crud.get_restaurant(db, restaurant_id)
-    if not db_restaurant:
-        raise HTTPException(status_code=404, detail="Restaurant not found")
-    return crud.get_restaurant_orders(db, restaurant_id=restaurant_id)
+async def get_restaurant_orders_history(
+    db_restaurant: models.Restaurant = Depends(get_restaurant_or_404),
+    db: AsyncSession = Depends(get_db),
+):
+    return await crud.get_restaurant_orders(db, restaurant_id=db_restaurant.id)
+
+
+@router.get("/{restaurant_id}/orders/export")
+async def export_restaurant_orders(
+    export_format: schemas.ExportFormat = Query(
+        schemas.ExportFormat.ndjson, alias="format"
+    ),
+    status: Optional[schemas.OrderStatus] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    db_restaurant: models.Restaurant = Depends(get_streamed_restaurant_or_404),
+):
+    """
+    Streams the restaurant's order history (newest first) as NDJSON or CSV,
+    with the same status and date filters as the order listing.
+    """
+    filename = f"restaurant-{db_restaurant.id}-orders.{export_format.value}"
+    return StreamingResponse(
+        exports.export_restaurant_orders(
+            db_restaurant.id,
+            export_format,
+            status=status,
+            start_date=start_date,
+            end_date=end_date,
+        ),
+        media_type=exports.MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@router.get("/{restaurant_id}/orders/events")
+async def stream_restaurant_order_events(
+    db_restaurant: models.Restaurant = Depends(get_streamed_restaurant_or_404),
+):
+    """
+    Server-sent events for the restaurant's live orders: `order_placed` for
+    each new order and `order_status` for each status change.
+    """
+    return StreamingResponse(
+        events.stream(events.restaurant_topic(db_restaurant.id)),
+        media_type="text/event-stream",
+        headers=events.SSE_HEADERS,
+    )
 
 
 @router.get("/{restaurant_id}/reviews", response_model=List[schemas.Review])
-def get_all_restaurant_reviews(restaurant_id: int, db: Session = Depends(get_db)):
-    db_restaurant = crud.get_restaurant(db, restaurant_id)
-    if not db_restaurant:
-        raise HTTPException(status_code=404, detail="Restaurant not found")
-    return crud.get_restaurant_reviews(db, restaurant_id=restaurant_id)
+async def get_all_restaurant_reviews(
+    response: Response,
+    sort: schemas.ReviewSort = schemas.ReviewSort.recent,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(
+        None, description="Opaque cursor from the X-Next-Cursor header"
+    ),
+    db_restaurant: models.Restaurant = Depends(get_restaurant_or_404),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    The restaurant's reviews, newest first or by rating (`highest`,
+    `lowest`). Use the `X-Next-Cursor` header as `cursor` for the next page.
+    """
+    try:
+        page = await crud.get_restaurant_reviews(
+            db,
+            restaurant_id=db_restaurant.id,
+            sort=sort,
+            skip=skip,
+            limit=limit,
+            cursor=cursor,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if page.next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = page.next_cursor
+    return page.items
+
+
+@router.get("/{restaurant_id}/reviews/summary", response_model=schemas.ReviewSummary)
+async def get_restaurant_review_summary(
+    latest: int = Query(3, ge=0, le=20),
+    db_restaurant: models.Restaurant = Depends(get_restaurant_or_404),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Star histogram and average rating (kept up to date as reviews change)
+    plus the `latest` most recent reviews.
+    """
+    return await business_logic.get_review_summary(db, db_restaurant, latest=latest)
+
+
+@router.get("/{restaurant_id}/popular-items", response_model=List[schemas.PopularItem])
+async def get_popular_items(
+    window: schemas.PopularityWindow = schemas.PopularityWindow.all,
+    limit: int = Query(5, ge=1, le=50),
+    db_restaurant: models.Restaurant = Depends(get_restaurant_or_404),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Best-selling menu items by quantity, all-time or over the last 7 or 30
+    days (`window=7d|30d`).
+    """
+    rows = await crud.get_popular_menu_items(
+        db, db_restaurant.id, limit=limit, days=window.days
+    )
+    return [row._asdict() for row in rows]
+
+
+@router.get(
+    "/{restaurant_id}/analytics/timeseries", response_model=schemas.RevenueTimeSeries
+)
+async def get_restaurant_time_series(
+    granularity: schemas.TimeSeriesGranularity = schemas.TimeSeriesGranularity.day,
+    start: Optional[date] = Query(None, description="First UTC day (inclusive)"),
+    end: Optional[date] = Query(None, description="Last UTC day (inclusive)"),
+    db_restaurant: models.Restaurant = Depends(get_restaurant_or_404),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Daily or hourly order counts and delivered revenue, one point per
+    bucket. Defaults to the last 30 days (daily) or today (hourly).
+    """
+    try:
+        return await business_logic.get_restaurant_time_series(
+            db, db_restaurant.id, granularity=granularity, start=start, end=end
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
 @router.get("/{restaurant_id}/analytics", response_model=schemas.RestaurantAnalytics)
-def get_restaurant_performance(restaurant_id: int, db: Session = Depends(get_db)):
-    db_restaurant = crud.get_restaurant(db, restaurant_id)
-    if not db_restaurant:
+async def get_restaurant_performance(
+    restaurant_id: int, db: AsyncSession = Depends(get_db)
+):
+    # The analytics read is itself a primary-key lookup on the restaurant, so
+    # it doubles as the existence check.
+    analytics = await business_logic.get_restaurant_analytics(
+        db, restaurant_id=restaurant_id
+    )
+    if analytics is None:
         raise HTTPException(status_code=404, detail="Restaurant not found")
-    return business_logic.get_restaurant_analytics(db, restaurant_id=restaurant_id)
+    return analytics
@@ -0,0 +1,29 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .. import crud, schemas
+from ..database import get_db
+
+router = APIRouter(
+    prefix="/search",
+    tags=["Search"],
+)
+
+
+@router.get("/", response_model=schemas.SearchResults)
+async def search(
+    q: str = Query(..., min_length=1, description="Words to search for"),
+    limit: int = Query(10, ge=1, le=50, description="Max results per type"),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Full-text search over restaurants (name, cuisine, location) and menu
+    items (name, description). Every word must match, words match as
+    prefixes, and results are ranked by relevance.
+    """
+    try:
+        restaurants = await crud.search_restaurants(db, q, limit=limit)
+        menu_items = await crud.search_menu_items(db, q, limit=limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"restaurants": restaurants, "menu_items": menu_items}
@@ -1,9 +1,41 @@
-from pydantic import BaseModel, EmailStr
-from typing import List, Optional
-from datetime import datetime
+from pydantic import BaseModel, ConfigDict, EmailStr, Field
+from typing import Annotated, Dict, List, Optional
+from datetime import date, datetime
+from enum import Enum
 from .models import OrderStatus
 
 
+class ExportFormat(str, Enum):
+    ndjson = "ndjson"
+    csv = "csv"
+
+
+class TimeSeriesGranularity(str, Enum):
+    day = "day"
+    hour = "hour"
+
+
+class PopularityWindow(str, Enum):
+    all = "all"
+    week = "7d"
+    month = "30d"
+
+    @property
+    def days(self) -> Optional[int]:
+        return {"7d": 7, "30d": 30}.get(self.value)
+
+
+class ReviewSort(str, Enum):
+    recent = "recent"
+    highest = "highest"
+    lowest = "lowest"
+
+
+class SlowQuerySort(str, Enum):
+    total = "total"
+    max = "max"
+
+
 # Base Schemas (common attributes)
 class MenuItemBase(BaseModel):
     name: str
@@ -32,7 +64,7 @@ class ReviewBase(BaseModel):
 
 class OrderItemBase(BaseModel):
     menu_item_id: int
-    quantity: int
+    quantity: int = Field(..., gt=0)
     special_requests: Optional[str] = None
 
 
@@ -50,7 +82,7 @@ class CustomerCreate(CustomerBase):
 
 
 class ReviewCreate(ReviewBase):
-    pass
+    rating: int = Field(..., ge=1, le=5)
 
 
 class OrderItemCreate(OrderItemBase):
@@ -69,19 +101,20 @@ class OrderStatusUpdate(BaseModel):
 
 
 # --- Response Schemas (what the API returns) ---
-# Use `orm_mode` to allow Pydantic to read data from ORM models
-
+# Built straight from ORM objects (`from_attributes`). Their data was
+# validated on the way in, so response models don't re-run input checks:
+# an email is a plain string here, not an `EmailStr` that would re-run
+# email validation for every customer nested in every order and review.
+ORM_CONFIG = ConfigDict(from_attributes=True)
 
-class Config:
-    orm_mode = True
+StoredEmail = Annotated[str, Field(json_schema_extra={"format": "email"})]
 
 
 class MenuItem(MenuItemBase):
     id: int
     restaurant_id: int
 
-    class Config(Config):
-        pass
+    model_config = ORM_CONFIG
 
 
 class Restaurant(RestaurantBase):
@@ -90,34 +123,31 @@ class Restaurant(RestaurantBase):
     created_at: datetime
     menu_items: List[MenuItem] = []
 
-    class Config(Config):
-        pass
+    model_config = ORM_CONFIG
 
 
 class SimpleRestaurant(RestaurantBase):
     id: int
     rating: float
 
-    class Config(Config):
-        pass
+    model_config = ORM_CONFIG
 
 
 class Customer(CustomerBase):
     id: int
+    email: StoredEmail
     is_active: bool
     created_at: datetime
 
-    class Config(Config):
-        pass
+    model_config = ORM_CONFIG
 
 
 class SimpleCustomer(BaseModel):
     id: int
     name: str
-    email: EmailStr
+    email: StoredEmail
 
-    class Config(Config):
-        pass
+    model_config = ORM_CONFIG
 
 
 class OrderItem(OrderItemBase):
@@ -125,8 +155,7 @@ class OrderItem(OrderItemBase):
     item_price: float
     menu_item: MenuItem  # Nested Menu Item details
 
-    class Config(Config):
-        pass
+    model_config = ORM_CONFIG
 
 
 class Review(ReviewBase):
@@ -137,8 +166,7 @@ class Review(ReviewBase):
     created_at: datetime
     customer: SimpleCustomer  # Nested customer details
 
-    class Config(Config):
-        pass
+    model_config = ORM_CONFIG
 
 
 class Order(BaseModel):
@@ -156,18 +184,60 @@ class Order(BaseModel):
     restaurant: SimpleRestaurant
     review: Optional[Review] = None
 
-    class Config(Config):
-        pass
+    model_config = ORM_CONFIG
+
+
+class OrderStatusChange(BaseModel):
+    id: int
+    order_status: OrderStatus
+    previous_status: Optional[OrderStatus] = None
+    version: int
+
+    model_config = ORM_CONFIG
+
+
+class SearchResults(BaseModel):
+    restaurants: List[SimpleRestaurant] = []
+    menu_items: List[MenuItem] = []
 
 
 # Analytics Schemas
 class RestaurantAnalytics(BaseModel):
     total_revenue: float
     total_orders: int
+    orders_by_status: Dict[str, int] = {}  # e.g., {"delivered": 42}
     average_rating: float
     popular_items: List[dict]  # e.g., [{"name": "Pizza", "count": 100}]
 
 
+class PopularItem(BaseModel):
+    menu_item_id: int
+    name: str
+    quantity_sold: int
+
+
+class RevenuePoint(BaseModel):
+    bucket: datetime  # Start of the day or hour (UTC)
+    total_orders: int  # Orders placed in the bucket
+    delivered_orders: int
+    cancelled_orders: int
+    revenue: float  # Delivered revenue of the orders placed in the bucket
+
+
+class RevenueTimeSeries(BaseModel):
+    granularity: TimeSeriesGranularity
+    start: date
+    end: date
+    points: List[RevenuePoint]
+
+
+class ReviewSummary(BaseModel):
+    review_count: int
+    average_rating: float
+    star_counts: Dict[int, int]  # e.g., {5: 12, 4: 3, 3: 0, 2: 1, 1: 0}
+    latest_reviews: List[Review]
+
+
 class CustomerAnalytics(BaseModel):
     total_spent: float
     total_orders: int
@@ -184,5 +254,5 @@ class MenuItemUpdate(BaseModel):
 
 
 class ReviewUpdate(BaseModel):
-    rating: Optional[int] = None
+    rating: Optional[int] = Field(None, ge=1, le=5)
     comment: Optional[str] = None
@@ -0,0 +1,155 @@
+"""
+Sync vs async load comparison for the v3 stack.
+
+Run from the directory containing the `zomato_v3` package, inside its git
+checkout, e.g.:
+
+    python -m zomato_v3.syncbench --concurrency 50 200 1000
+
+Rebuilds the synchronous v3 (SQLAlchemy `Session` in Starlette's
+threadpool) from git history as a package named `zomato_v3_sync`: by
+default the commit just before `create_async_engine` first appeared in
+`database.py`, or any `--ref`. Then runs `loadtest` on the same seeded
+traffic against it (`--app zomato_v3_sync.main:app`) and against the
+current app, at each concurrency. Every run is a separate process in a
+fresh directory with its own database (the sync app keeps its database in
+`./zomato_v3.db`), and a run that hasn't finished after `--timeout`
+seconds is killed and reported as stalled. Prints a JSON report of
+throughput, errors and p50/p95 milliseconds for the main routes.
+"""
+
+import argparse
+import io
+import json
+import os
+import subprocess
+import sys
+import tarfile
+import tempfile
+from pathlib import Path
+from typing import List, Optional
+
+PACKAGE_DIR = Path(__file__).resolve().parent
+SYNC_PACKAGE = "zomato_v3_sync"
+SYNC_APP = f"{SYNC_PACKAGE}.main:app"
+
+ROUTES = (
+    "GET /restaurants/",
+    "GET /restaurants/{restaurant_id}",
+    "POST /customers/{customer_id}/orders/",
+    "PUT /orders/{order_id}/status",
+)
+
+
+def git(*args: str, cwd: Path = PACKAGE_DIR) -> bytes:
+    return subprocess.run(
+        ["git", "-C", str(cwd), *args], check=True, capture_output=True
+    ).stdout
+
+
+def find_sync_ref() -> str:
+    """The parent of the commit that introduced `create_async_engine`."""
+    commits = git(
+        "log", "--format=%H", "-S", "create_async_engine", "--", "database.py"
+    ).split()
+    if not commits:
+        raise SystemExit("no commit adds create_async_engine here; pass --ref")
+    return commits[-1].decode() + "^"
+
+
+def build_sync_package(ref: str, parent: Path) -> Path:
+    """Extracts this package's directory at `ref` as `parent/zomato_v3_sync`."""
+    top, prefix = git("rev-parse", "--show-toplevel", "--show-prefix").decode().split()
+    # git archive only takes a tree-ish path from the top of the checkout
+    archive = git("archive", "--format=tar", f"{ref}:{prefix}", cwd=Path(top))
+    target = parent / SYNC_PACKAGE
+    with tarfile.open(fileobj=io.BytesIO(archive)) as tar:
+        tar.extractall(target, filter="data")
+    return target
+
+
+def summarize(report: dict) -> dict:
+    routes = report["routes"]
+    return {
+        "throughput_rps": report["throughput_rps"],
+        "errors": report["errors"],
+        **{
+            route: f"{routes[route]['p50_ms']} / {routes[route]['p95_ms']}"
+            for route in ROUTES
+            if route in routes
+        },
+    }
+
+
+def run_loadtest(app: Optional[str], concurrency: int, args, pythonpath: List[str]):
+    with tempfile.TemporaryDirectory() as workdir:
+        output = os.path.join(workdir, "report.json")
+        command = [
+            sys.executable,
+            "-m",
+            "zomato_v3.loadtest",
+            f"--requests={args.requests}",
+            f"--seed={args.seed}",
+            f"--concurrency={concurrency}",
+            f"--output={output}",
+        ]
+        if app:
+            command.append(f"--app={app}")
+        env = {
+            **os.environ,
+            "PYTHONPATH": os.pathsep.join(pythonpath),
+            "ZOMATO_DATABASE_URL": "sqlite+aiosqlite:///./zomato_v3.db",
+        }
+        try:
+            subprocess.run(
+                command,
+                cwd=workdir,
+                env=env,
+                timeout=args.timeout,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+        except subprocess.TimeoutExpired:
+            return {"stalled": f"no report after {args.timeout:g} s"}
+        if not os.path.exists(output):
+            return {"failed": "loadtest exited without a report"}
+        with open(output) as report:
+            return summarize(json.load(report))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--ref", help="commit of the sync app; default: the one before the async port"
+    )
+    parser.add_argument(
+        "--concurrency", type=int, nargs="+", default=[50, 200, 1000], metavar="N"
+    )
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument(
+        "--timeout", type=float, default=600, help="seconds before a run is stalled"
+    )
+    args = parser.parse_args(argv)
+    if args.requests < 1 or min(args.concurrency) < 1:
+        parser.error("--requests and --concurrency must be positive")
+
+    ref = args.ref or find_sync_ref()
+    with tempfile.TemporaryDirectory() as build_dir:
+        build_sync_package(ref, Path(build_dir))
+        pythonpath = [str(PACKAGE_DIR.parent), build_dir]
+        if os.environ.get("PYTHONPATH"):
+            pythonpath.append(os.environ["PYTHONPATH"])
+        report = {"sync_ref": git("rev-parse", ref).decode().strip()}
+        for concurrency in args.concurrency:
+            report[str(concurrency)] = {
+                "sync": run_loadtest(SYNC_APP, concurrency, args, pythonpath),
+                "async": run_loadtest(None, concurrency, args, pythonpath),
+            }
+            print(json.dumps({concurrency: report[str(concurrency)]}), file=sys.stderr)
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,118 @@
+import os
+import sqlite3
+import sys
+import tempfile
+from contextlib import contextmanager
+from itertools import count
+
+import pytest
+
+# The engine is created at import time, so the test database has to be
+# chosen before anything imports the app.
+_db_dir = tempfile.TemporaryDirectory()
+os.environ["ZOMATO_DATABASE_URL"] = (
+    f"sqlite+aiosqlite:///{os.path.join(_db_dir.name, 'test.db')}"
+)
+os.environ["ZOMATO_SLOW_QUERY_LOG"] = ""
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+
+from zomato_v3.database import engine  # noqa: E402
+from zomato_v3.main import app  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def client():
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def count_statements():
+    """
+    `with count_statements() as statements:` collects the `(statement,
+    parameters)` pairs run inside, as sent to the database driver.
+    """
+
+    @contextmanager
+    def counting():
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, *args):
+            statements.append((statement, parameters))
+
+        event.listen(engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+        try:
+            yield statements
+        finally:
+            event.remove(
+                engine.sync_engine, "before_cursor_execute", before_cursor_execute
+            )
+
+    return counting
+
+
+@pytest.fixture
+def query_plan(client):
+    """
+    `query_plan(statement, parameters=())` returns SQLite's EXPLAIN QUERY
+    PLAN details for a statement, one string per plan step.
+    """
+    connection = sqlite3.connect(engine.url.database)
+
+    def explain(statement, parameters=()):
+        rows = connection.execute("EXPLAIN QUERY PLAN " + statement, parameters)
+        return [row[3] for row in rows]
+
+    yield explain
+    connection.close()
+
+
+@pytest.fixture
+def restaurant(client):
+    """A restaurant with a 12-item menu."""
+    response = client.post(
+        "/restaurants/",
+        json={"name": "Test Kitchen", "location": "Sector 1", "cuisine": "Italian"},
+    )
+    assert response.status_code == 201
+    restaurant = response.json()
+    restaurant["menu_item_ids"] = [
+        client.post(
+            f"/restaurants/{restaurant['id']}/menu-items/",
+            json={"name": f"Dish {i}", "price": 100 + i},
+        ).json()["id"]
+        for i in range(12)
+    ]
+    return restaurant
+
+
+_customer_numbers = count()
+
+
+@pytest.fixture
+def make_customer(client):
+    """Creates a new customer on each call."""
+
+    def make():
+        n = next(_customer_numbers)
+        response = client.post(
+            "/customers/",
+            json={
+                "name": f"Customer {n}",
+                "email": f"customer{n}@example.com",
+                "phone_number": f"+91 90000 {n:05d}",
+                "address": f"{n} Test Road",
+            },
+        )
+        assert response.status_code == 201
+        return response.json()
+
+    return make
+
+
+@pytest.fixture
+def customer(make_customer):
+    return make_customer()
@@ -0,0 +1,50 @@
+from zomato_v3 import cache, crud
+from zomato_v3.cache import LRUCache
+
+
+def test_set_is_skipped_after_invalidation():
+    lru = LRUCache("test")
+    generation = lru.generation(1)
+    lru.invalidate(1)
+    assert lru.set(1, "stale", generation) is False
+    assert lru.get(1) is None
+
+    assert lru.set(1, "fresh", lru.generation(1)) is True
+    assert lru.get(1) == "fresh"
+
+
+def test_set_is_skipped_after_clear():
+    lru = LRUCache("test")
+    generation = lru.generation(1)
+    lru.clear()
+    assert lru.set(1, "stale", generation) is False
+    assert lru.get(1) is None
+
+
+def test_invalidating_another_key_does_not_block_set():
+    lru = LRUCache("test")
+    generation = lru.generation(1)
+    lru.invalidate(2)
+    assert lru.set(1, "value", generation) is True
+
+
+def test_restaurant_detail_not_cached_if_invalidated_during_read(
+    client, restaurant, monkeypatch
+):
+    """An update landing while the detail is read must not be overwritten."""
+    restaurant_id = restaurant["id"]
+    cache.restaurant_cache.invalidate(restaurant_id)
+    get_restaurant = crud.get_restaurant
+
+    async def get_restaurant_then_invalidate(db, restaurant_id):
+        db_restaurant = await get_restaurant(db, restaurant_id)
+        cache.restaurant_cache.invalidate(restaurant_id)
+        return db_restaurant
+
+    monkeypatch.setattr(crud, "get_restaurant", get_restaurant_then_invalidate)
+    assert client.get(f"/restaurants/{restaurant_id}").status_code == 200
+    assert cache.restaurant_cache.get(restaurant_id) is None
+
+    monkeypatch.setattr(crud, "get_restaurant", get_restaurant)
+    assert client.get(f"/restaurants/{restaurant_id}").status_code == 200
+    assert cache.restaurant_cache.get(restaurant_id) is not None
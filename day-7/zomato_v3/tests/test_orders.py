@@ -0,0 +1,30 @@
+from zomato_v3.tests.test_query_counts import place_order
+
+
+def test_status_update_response_shapes(client, customer, restaurant):
+    order = place_order(client, customer, restaurant, items=3).json()
+    assert order["order_status"] == "placed"
+    assert len(order["items"]) == 3
+
+    response = client.put(
+        f"/orders/{order['id']}/status",
+        params={"slim": True},
+        json={"status": "confirmed"},
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    assert response.json() == {
+        "id": order["id"],
+        "order_status": "confirmed",
+        "previous_status": "placed",
+        "version": response.json()["version"],
+    }
+
+    response = client.put(f"/orders/{order['id']}/status", json={"status": "preparing"})
+    assert response.status_code == 200
+    full = response.json()
+    assert full["order_status"] == "preparing"
+    assert full["customer"]["id"] == customer["id"]
+    assert [item["id"] for item in full["items"]] == [
+        item["id"] for item in order["items"]
+    ]
@@ -0,0 +1,44 @@
+import base64
+import json
+
+import pytest
+
+from zomato_v3.pagination import decode_cursor, encode_cursor
+
+LIST_PATHS = ["/restaurants/", "/customers/", "/menu-items/", "/reviews/"]
+
+
+def raw_cursor(values) -> str:
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+@pytest.mark.parametrize("path", LIST_PATHS)
+@pytest.mark.parametrize("limit", [0, -1, 100_000])
+def test_out_of_range_limit_is_rejected(client, path, limit):
+    assert client.get(path, params={"limit": limit}).status_code == 422
+
+
+@pytest.mark.parametrize("path", LIST_PATHS)
+def test_malformed_cursor_is_rejected(client, path):
+    for cursor in ["not-base64!", raw_cursor([{"a": 1}, 1]), raw_cursor([None])]:
+        response = client.get(path, params={"cursor": cursor})
+        assert response.status_code == 400, (cursor, response.text)
+
+
+def test_negative_skip_is_rejected(client, restaurant):
+    paths = LIST_PATHS + [f"/restaurants/{restaurant['id']}/reviews"]
+    for path in paths:
+        assert client.get(path, params={"skip": -1}).status_code == 422, path
+
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor(["Café", 7]), 2) == ["Café", 7]
+    assert decode_cursor(encode_cursor([4.5, 12]), 2) == [4.5, 12]
+
+
+@pytest.mark.parametrize(
+    "values", [[{"a": 1}, 1], [[1], 1], [None, 1], [True, 1], ["x"], ["x", 1, 2]]
+)
+def test_decode_cursor_rejects_unexpected_values(values):
+    with pytest.raises(ValueError):
+        decode_cursor(raw_cursor(values), 2)
@@ -0,0 +1,60 @@
+"""
+Statement counts for the hot paths. A change that adds a query per item or
+per order (an N+1) fails here instead of showing up as a slow endpoint.
+"""
+
+
+def place_order(client, customer, restaurant, items: int):
+    return client.post(
+        f"/customers/{customer['id']}/orders/",
+        json={
+            "restaurant_id": restaurant["id"],
+            "items": [
+                {"menu_item_id": item_id, "quantity": 2}
+                for item_id in restaurant["menu_item_ids"][:items]
+            ],
+        },
+    )
+
+
+def test_order_placement_statement_count(
+    client, count_statements, customer, restaurant
+):
+    with count_statements() as statements:
+        response = place_order(client, customer, restaurant, items=12)
+    assert response.status_code == 201
+    assert len(response.json()["items"]) == 12
+    assert len(statements) == 9, statements
+
+
+def test_order_placement_rejects_non_positive_quantity(client, customer, restaurant):
+    for quantity in (0, -3):
+        response = client.post(
+            f"/customers/{customer['id']}/orders/",
+            json={
+                "restaurant_id": restaurant["id"],
+                "items": [
+                    {
+                        "menu_item_id": restaurant["menu_item_ids"][0],
+                        "quantity": quantity,
+                    }
+                ],
+            },
+        )
+        assert response.status_code == 422
+
+
+def test_order_history_statement_count_is_independent_of_history_length(
+    client, count_statements, make_customer, restaurant
+):
+    counts = []
+    for orders in (4, 40):
+        customer = make_customer()
+        for _ in range(orders):
+            assert place_order(client, customer, restaurant, items=3).status_code == 201
+        with count_statements() as statements:
+            response = client.get(f"/customers/{customer['id']}/orders")
+        assert response.status_code == 200
+        assert len(response.json()) == orders
+        counts.append(len(statements))
+    assert counts[0] == counts[1], counts
@@ -0,0 +1,93 @@
+"""
+The listings and analytics queries must read orders and reviews through
+their composite indexes, in index order. A plan that falls back to a
+table scan or a temp B-tree sort works on a small database and degrades
+linearly with the orders table, so it fails here.
+"""
+
+from datetime import date
+
+import pytest
+from sqlalchemy import select
+
+from zomato_v3 import crud, models
+from zomato_v3.database import engine
+from zomato_v3.pagination import encode_cursor
+from zomato_v3.utils import business_logic
+
+
+def compile_sql(stmt) -> str:
+    return str(
+        stmt.compile(dialect=engine.dialect, compile_kwargs={"literal_binds": True})
+    )
+
+
+def assert_uses_index(plan, table: str, index: str):
+    assert any(
+        step.startswith(f"SEARCH {table} USING") and f"INDEX {index} " in step
+        for step in plan
+    ), plan
+    assert not any("TEMP B-TREE" in step for step in plan), plan
+    assert not any(step.startswith(f"SCAN {table}") for step in plan), plan
+
+
+def captured(statements, table: str):
+    """The one captured statement that reads from `table`."""
+    matches = [
+        (statement, parameters)
+        for statement, parameters in statements
+        if f"\nFROM {table} " in statement
+    ]
+    assert len(matches) == 1, statements
+    return matches[0]
+
+
+@pytest.mark.parametrize(
+    "status, start_date, end_date, index",
+    [
+        (None, None, None, "ix_orders_restaurant_date"),
+        (None, date(2024, 1, 1), date(2024, 2, 1), "ix_orders_restaurant_date"),
+        (models.OrderStatus.placed, None, None, "ix_orders_restaurant_status_date"),
+        (
+            models.OrderStatus.delivered,
+            date(2024, 1, 1),
+            date(2024, 2, 1),
+            "ix_orders_restaurant_status_date",
+        ),
+    ],
+)
+def test_restaurant_orders_plan(query_plan, status, start_date, end_date, index):
+    stmt = crud._filter_restaurant_orders(
+        select(models.Order), 1, status, start_date, end_date
+    )
+    assert_uses_index(query_plan(compile_sql(stmt)), "orders", index)
+
+
+def test_customer_order_history_plan(client, count_statements, query_plan, customer):
+    with count_statements() as statements:
+        response = client.get(f"/customers/{customer['id']}/orders")
+    assert response.status_code == 200
+    plan = query_plan(*captured(statements, "orders"))
+    assert_uses_index(plan, "orders", "ix_orders_customer_date")
+
+
+@pytest.mark.parametrize("sort", ["highest", "lowest"])
+@pytest.mark.parametrize("cursor", [None, encode_cursor([4, 10])])
+def test_rating_sorted_reviews_plan(
+    client, count_statements, query_plan, restaurant, sort, cursor
+):
+    params = {"sort": sort}
+    if cursor:
+        params["cursor"] = cursor
+    with count_statements() as statements:
+        response = client.get(f"/restaurants/{restaurant['id']}/reviews", params=params)
+    assert response.status_code == 200
+    plan = query_plan(*captured(statements, "reviews"))
+    assert_uses_index(plan, "reviews", "ix_reviews_restaurant_rating")
+
+
+def test_restaurant_analytics_rebuild_plan(query_plan):
+    """Revenue and per-status counts for one restaurant, from its orders."""
+    stats_insert = business_logic.restaurant_stats_rebuild_statements(1)[2]
+    plan = query_plan(compile_sql(stats_insert))
+    assert_uses_index(plan, "orders", "ix_orders_restaurant_date")
@@ -0,0 +1,115 @@
+import asyncio
+
+import httpx
+from sqlalchemy import event
+
+from zomato_v3.database import engine
+from zomato_v3.main import app
+
+# More than the engine's pool_size + max_overflow (10 + 20)
+OPEN_STREAMS = 40
+
+
+async def open_stream(path: str, disconnected: asyncio.Event):
+    """
+    Starts a GET on `path` and returns once its response has started, with
+    the response status and the task still serving the body. The client
+    disconnects when `disconnected` is set.
+    """
+    started = asyncio.get_running_loop().create_future()
+    requested = False
+
+    async def receive():
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await disconnected.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.start" and not started.done():
+            started.set_result(message["status"])
+
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"host", b"testserver")],
+        "client": ("testclient", 50000),
+        "server": ("testserver", 80),
+    }
+    task = asyncio.ensure_future(app(scope, receive, send))
+    return await asyncio.wait_for(started, timeout=10), task
+
+
+def test_open_streams_do_not_hold_connections(client, restaurant, customer):
+    order = client.post(
+        f"/customers/{customer['id']}/orders/",
+        json={
+            "restaurant_id": restaurant["id"],
+            "items": [{"menu_item_id": restaurant["menu_item_ids"][0], "quantity": 1}],
+        },
+    ).json()
+    paths = [
+        f"/orders/{order['id']}/events",
+        f"/restaurants/{restaurant['id']}/orders/events",
+    ]
+
+    async def scenario():
+        disconnected = asyncio.Event()
+        streams = [
+            await open_stream(paths[i % len(paths)], disconnected)
+            for i in range(OPEN_STREAMS)
+        ]
+        try:
+            assert [status for status, _ in streams] == [200] * OPEN_STREAMS
+            checked_out = engine.pool.checkedout()
+            async with httpx.AsyncClient(
+                transport=httpx.ASGITransport(app=app), base_url="http://testserver"
+            ) as http:
+                listing = await asyncio.wait_for(http.get("/restaurants/"), timeout=10)
+            return checked_out, listing.status_code
+        finally:
+            disconnected.set()
+            await asyncio.wait([task for _, task in streams], timeout=10)
+
+    checked_out, status = client.portal.call(scenario)
+    assert checked_out == 0
+    assert status == 200
+
+
+def test_export_holds_one_connection(client, restaurant, customer):
+    client.post(
+        f"/customers/{customer['id']}/orders/",
+        json={
+            "restaurant_id": restaurant["id"],
+            "items": [{"menu_item_id": restaurant["menu_item_ids"][0], "quantity": 1}],
+        },
+    )
+    checked_out = [0]
+    peak = [0]
+
+    def checkout(*args):
+        checked_out[0] += 1
+        peak[0] = max(peak[0], checked_out[0])
+
+    def checkin(*args):
+        checked_out[0] -= 1
+
+    event.listen(engine.sync_engine.pool, "checkout", checkout)
+    event.listen(engine.sync_engine.pool, "checkin", checkin)
+    try:
+        response = client.get(f"/restaurants/{restaurant['id']}/orders/export")
+    finally:
+        event.remove(engine.sync_engine.pool, "checkout", checkout)
+        event.remove(engine.sync_engine.pool, "checkin", checkin)
+    assert response.status_code == 200
+    assert response.text.count("\n") >= 1
+    assert peak[0] == 1
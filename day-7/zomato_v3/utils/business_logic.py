@@ -1,28 +1,43 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import func
-from .. import models, schemas, crud
-from typing import List
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy import Integer, case, cast, delete, func, insert, select, update
+from .. import cache, events, models, schemas, crud
+from datetime import date, datetime, time, timedelta, timezone
+from typing import List, Optional
 
 
-def calculate_and_create_order(
-    db: Session, order_data: schemas.OrderCreate, customer_id: int
+async def calculate_and_create_order(
+    db: AsyncSession, order_data: schemas.OrderCreate, customer: models.Customer
 ):
     """
     Business logic to create an order:
-    1. Fetches menu items to verify existence and get current prices.
+    1. Fetches all menu items (and their restaurant) in a single IN (...) query
+       to verify availability and ownership and get current prices.
     2. Calculates total amount.
-    3. Creates the Order and associated OrderItem records.
+    3. Creates the Order, then bulk-inserts its OrderItem records.
+
+    Returns the created `models.Order` with its relationships populated from
+    the objects already in memory, so the route's response_model serializes
+    it in one pass without reloading the order graph.
     """
+    if not order_data.items:
+        raise ValueError("An order must contain at least one item.")
+
+    requested_ids = {item_in.menu_item_id for item_in in order_data.items}
+    result = await db.execute(
+        select(models.MenuItem)
+        .options(joinedload(models.MenuItem.restaurant))
+        .filter(models.MenuItem.id.in_(requested_ids))
+    )
+    menu_items = {menu_item.id: menu_item for menu_item in result.scalars()}
+
     total_amount = 0
-    order_items_to_create = []
+    order_item_rows = []
 
     # Verify all menu items exist and calculate total price
     for item_in in order_data.items:
-        menu_item = (
-            db.query(models.MenuItem)
-            .filter(models.MenuItem.id == item_in.menu_item_id)
-            .first()
-        )
+        menu_item = menu_items.get(item_in.menu_item_id)
         if not menu_item or not menu_item.is_available:
             raise ValueError(
                 f"Menu item with ID {item_in.menu_item_id} is not available."
@@ -35,104 +50,486 @@ def calculate_and_create_order(
         item_total = menu_item.price * item_in.quantity
         total_amount += item_total
 
-        # Prepare OrderItem object (without committing yet)
-        order_items_to_create.append(
-            models.OrderItem(
-                menu_item_id=item_in.menu_item_id,
-                quantity=item_in.quantity,
-                item_price=menu_item.price,  # Storing price at time of order
-                special_requests=item_in.special_requests,
-            )
+        # Prepare the OrderItem row; order_id is filled in once the order exists
+        order_item_rows.append(
+            {
+                "menu_item_id": item_in.menu_item_id,
+                "quantity": item_in.quantity,
+                "item_price": menu_item.price,  # Storing price at time of order
+                "special_requests": item_in.special_requests,
+            }
         )
 
-    # Get customer's address if no delivery address is provided
+    # Use the customer's address if no delivery address is provided
     delivery_address = order_data.delivery_address
     if not delivery_address:
-        customer = crud.get_customer(db, customer_id)
-        if not customer or not customer.address:
+        if not customer.address:
             raise ValueError(
                 "Delivery address must be provided if customer has no default address."
             )
         delivery_address = customer.address
 
-    # Create the main order record
+    # Create the main order record. Relationships are populated from the
+    # objects we already hold so serializing the order needs no lazy loads.
     db_order = models.Order(
-        customer_id=customer_id,
+        customer_id=customer.id,
         restaurant_id=order_data.restaurant_id,
         total_amount=round(total_amount, 2),
         delivery_address=delivery_address,
         special_instructions=order_data.special_instructions,
+        delivery_time=None,
+        customer=customer,
+        restaurant=menu_items[order_data.items[0].menu_item_id].restaurant,
+        review=None,
     )
+    db.add(db_order)
+    await db.flush()  # INSERT ... RETURNING gives us the id and order_date
 
-    # Associate the items with the order
-    db_order.items = order_items_to_create
+    # Insert every line item in a single multi-row INSERT. The rows come
+    # back as ORM objects; their menu_item is set from the lookup above
+    # rather than left to the identity map, which doesn't keep the menu
+    # items alive once this function returns.
+    for row in order_item_rows:
+        row["order_id"] = db_order.id
+    result = await db.scalars(
+        insert(models.OrderItem).returning(models.OrderItem),
+        order_item_rows,
+        execution_options={"render_nulls": True},  # keep NULLs in one batch
+    )
+    db_items = result.all()
+    for db_item in db_items:
+        set_committed_value(db_item, "menu_item", menu_items[db_item.menu_item_id])
+    set_committed_value(db_order, "items", sorted(db_items, key=lambda i: i.id))
 
-    db.add(db_order)
-    db.commit()
-    db.refresh(db_order)
+    item_quantities = {}
+    for item_in in order_data.items:
+        item_quantities[item_in.menu_item_id] = (
+            item_quantities.get(item_in.menu_item_id, 0) + item_in.quantity
+        )
+    await crud.record_order_placed(
+        db, order_data.restaurant_id, item_quantities, placed_at=db_order.order_date
+    )
+
+    await db.commit()
+    cache.customer_analytics_cache.invalidate(customer.id)
+    events.publish_order("order_placed", db_order)
 
     return db_order
 
 
-def update_restaurant_rating(db: Session, restaurant_id: int):
-    """Calculates and updates the average rating for a restaurant."""
-    avg_rating = (
-        db.query(func.avg(models.Review.rating))
-        .filter(models.Review.restaurant_id == restaurant_id)
-        .scalar()
-    )
-
-    db_restaurant = crud.get_restaurant(db, restaurant_id)
-    if db_restaurant:
-        db_restaurant.rating = round(avg_rating, 2) if avg_rating else 0.0
-        db.commit()
-        db.refresh(db_restaurant)
-
-
-def get_restaurant_analytics(db: Session, restaurant_id: int):
-    """Calculates performance metrics for a restaurant."""
-    # Total Revenue
-    total_revenue = (
-        db.query(func.sum(models.Order.total_amount))
-        .filter(
-            models.Order.restaurant_id == restaurant_id,
-            models.Order.order_status == models.OrderStatus.delivered,
-        )
-        .scalar()
-        or 0.0
+async def rebuild_restaurant_ratings(
+    db: AsyncSession, restaurant_id: Optional[int] = None
+):
+    """
+    Rebuilds the running rating totals (the average and the per-star
+    counts) from the reviews table. Reviews keep these counters up to date incrementally; this is the
+    repair path for backfills or drift. Rebuilds every restaurant unless a
+    restaurant_id is given. Returns the number of restaurants updated.
+    """
+    rating_sum = (
+        select(func.coalesce(func.sum(models.Review.rating), 0))
+        .where(models.Review.restaurant_id == models.Restaurant.id)
+        .scalar_subquery()
     )
-
-    # Total Orders
-    total_orders = (
-        db.query(func.count(models.Order.id))
-        .filter(models.Order.restaurant_id == restaurant_id)
-        .scalar()
+    rating_count = (
+        select(func.count(models.Review.id))
+        .where(models.Review.restaurant_id == models.Restaurant.id)
+        .scalar_subquery()
+    )
+    avg_rating = (
+        select(func.coalesce(func.round(func.avg(models.Review.rating), 2), 0.0))
+        .where(models.Review.restaurant_id == models.Restaurant.id)
+        .scalar_subquery()
     )
 
-    # Popular Items
-    popular_items_query = (
-        db.query(
-            models.MenuItem.name,
-            func.sum(models.OrderItem.quantity).label("total_quantity"),
+    star_counts = {
+        models.Restaurant.star_column(stars): (
+            select(func.count(models.Review.id))
+            .where(
+                models.Review.restaurant_id == models.Restaurant.id,
+                models.Review.rating == stars,
+            )
+            .scalar_subquery()
         )
-        .join(models.OrderItem)
-        .join(models.Order)
-        .filter(models.Order.restaurant_id == restaurant_id)
-        .group_by(models.MenuItem.name)
-        .order_by(desc("total_quantity"))
-        .limit(5)
-        .all()
+        for stars in models.REVIEW_STARS
+    }
+
+    stmt = update(models.Restaurant).values(
+        {
+            models.Restaurant.rating_sum: rating_sum,
+            models.Restaurant.rating_count: rating_count,
+            models.Restaurant.rating: avg_rating,
+            models.Restaurant.version: models.Restaurant.version + 1,
+            **star_counts,
+        }
     )
+    if restaurant_id is not None:
+        stmt = stmt.where(models.Restaurant.id == restaurant_id)
+    updated = (
+        await db.execute(stmt.execution_options(synchronize_session=False))
+    ).rowcount
+    await db.commit()
+    if restaurant_id is None:
+        cache.restaurant_cache.clear()
+    else:
+        cache.restaurant_cache.invalidate(restaurant_id)
+    return updated
+
+
+async def get_restaurant_analytics(db: AsyncSession, restaurant_id: int):
+    """
+    Reads a restaurant's performance metrics from its rollup tables.
+    Returns None if the restaurant doesn't exist.
+    """
+    row = await crud.get_restaurant_stats(db, restaurant_id)
+    if row is None:
+        return None
+    rating, stats = row
 
     popular_items = [
-        {"name": name, "count": count} for name, count in popular_items_query
+        {"name": name, "count": count}
+        for _, name, count in await crud.get_popular_menu_items(db, restaurant_id)
     ]
 
-    restaurant = crud.get_restaurant(db, restaurant_id)
+    orders_by_status = {
+        status.value: (
+            getattr(stats, models.RestaurantStats.status_column(status).key)
+            if stats
+            else 0
+        )
+        for status in models.OrderStatus
+    }
 
     return schemas.RestaurantAnalytics(
-        total_revenue=round(total_revenue, 2),
-        total_orders=total_orders,
-        average_rating=restaurant.rating if restaurant else 0.0,
+        total_revenue=round(stats.delivered_revenue, 2) if stats else 0.0,
+        total_orders=stats.total_orders if stats else 0,
+        orders_by_status=orders_by_status,
+        average_rating=rating or 0.0,
         popular_items=popular_items,
     )
+
+
+# Longest range a time series may span, per granularity
+TIME_SERIES_MAX_DAYS = {
+    schemas.TimeSeriesGranularity.day: 3660,
+    schemas.TimeSeriesGranularity.hour: 31,
+}
+
+
+async def get_restaurant_time_series(
+    db: AsyncSession,
+    restaurant_id: int,
+    granularity: schemas.TimeSeriesGranularity = schemas.TimeSeriesGranularity.day,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+):
+    """
+    Order counts and delivered revenue per day (or hour) from `start` to
+    `end` inclusive (UTC days), read from the restaurant's time buckets and
+    zero-filled so every bucket in the range has a point. Defaults to the
+    last 30 days, or to today for hourly series. Raises ValueError for an
+    empty or too-long range.
+    """
+    end = end or datetime.now(timezone.utc).date()
+    if start is None:
+        start = end
+        if granularity == schemas.TimeSeriesGranularity.day:
+            start -= timedelta(days=29)
+    days = (end - start).days + 1
+    if days < 1:
+        raise ValueError("start must not be after end.")
+    if days > TIME_SERIES_MAX_DAYS[granularity]:
+        raise ValueError(
+            f"{granularity.value} series can span at most "
+            f"{TIME_SERIES_MAX_DAYS[granularity]} days."
+        )
+
+    rows = await crud.get_restaurant_time_buckets(
+        db, restaurant_id, granularity, start, end
+    )
+    hourly = granularity == schemas.TimeSeriesGranularity.hour
+    buckets = {(row.day, row.hour if hourly else 0): row for row in rows}
+    points = []
+    for offset in range(days):
+        day = start + timedelta(days=offset)
+        for hour in range(24) if hourly else (0,):
+            row = buckets.get((day, hour))
+            points.append(
+                schemas.RevenuePoint(
+                    bucket=datetime.combine(day, time(hour)),
+                    total_orders=row.total_orders if row else 0,
+                    delivered_orders=row.delivered_orders if row else 0,
+                    cancelled_orders=row.cancelled_orders if row else 0,
+                    revenue=round(row.delivered_revenue, 2) if row else 0.0,
+                )
+            )
+    return schemas.RevenueTimeSeries(
+        granularity=granularity, start=start, end=end, points=points
+    )
+
+
+async def get_review_summary(
+    db: AsyncSession, db_restaurant: models.Restaurant, latest: int = 3
+):
+    """
+    A restaurant's star histogram and average, read from its running
+    counters, plus its `latest` most recent reviews.
+    """
+    latest_reviews = []
+    if latest:
+        page = await crud.get_restaurant_reviews(db, db_restaurant.id, limit=latest)
+        latest_reviews = page.items
+    return schemas.ReviewSummary(
+        review_count=db_restaurant.rating_count,
+        average_rating=db_restaurant.rating or 0.0,
+        star_counts={
+            stars: getattr(db_restaurant, models.Restaurant.star_column(stars).key)
+            for stars in models.REVIEW_STARS
+        },
+        latest_reviews=[
+            schemas.Review.model_validate(review, from_attributes=True)
+            for review in latest_reviews
+        ],
+    )
+
+
+def _customer_analytics(restaurant_totals) -> schemas.CustomerAnalytics:
+    """
+    Folds a customer's per-restaurant `(Restaurant, order_count,
+    delivered_spend)` totals into their analytics. Spend counts delivered
+    orders only, like restaurant revenue; favorites go by order count.
+    """
+    total_spent = 0.0
+    total_orders = 0
+    favorite = None
+    orders_by_cuisine = {}
+    for restaurant, order_count, spent in restaurant_totals:
+        total_spent += spent
+        total_orders += order_count
+        # Ties go to the bigger spend, then the lower restaurant id
+        rank = (order_count, spent, -restaurant.id)
+        if favorite is None or rank > favorite[0]:
+            favorite = (rank, restaurant)
+        orders_by_cuisine[restaurant.cuisine] = (
+            orders_by_cuisine.get(restaurant.cuisine, 0) + order_count
+        )
+
+    favorite_cuisine = None
+    if orders_by_cuisine:
+        favorite_cuisine = min(
+            orders_by_cuisine,
+            key=lambda cuisine: (-orders_by_cuisine[cuisine], cuisine),
+        )
+    return schemas.CustomerAnalytics(
+        total_spent=round(total_spent, 2),
+        total_orders=total_orders,
+        favorite_restaurant=(
+            schemas.SimpleRestaurant.model_validate(favorite[1], from_attributes=True)
+            if favorite
+            else None
+        ),
+        favorite_cuisine=favorite_cuisine,
+    )
+
+
+async def get_customer_analytics(db: AsyncSession, customer_id: int):
+    """
+    A customer's spend, order count and favorites, read through the
+    analytics cache. Returns None if the customer doesn't exist.
+    """
+    generation = cache.customer_analytics_cache.generation(customer_id)
+    cached = cache.customer_analytics_cache.get(customer_id)
+    if cached is None:
+        if await crud.get_customer(db, customer_id) is None:
+            return None
+        rows = await crud.get_customer_restaurant_totals(db, customer_id, customer_id)
+        cached = _customer_analytics(row[1:] for row in rows)
+        cache.customer_analytics_cache.set(customer_id, cached, generation)
+    return cached
+
+
+async def iter_customer_analytics(db: AsyncSession, chunk_size: int = 1000):
+    """
+    Yields `(customer_id, schemas.CustomerAnalytics)` for every customer in
+    id order, `chunk_size` customers at a time: one query for the chunk's
+    ids and one grouped aggregate over that id range of orders.
+    """
+    last_id = 0
+    while True:
+        customer_ids = await crud.get_customer_ids(
+            db, after_id=last_id, limit=chunk_size
+        )
+        if not customer_ids:
+            return
+        totals = {customer_id: [] for customer_id in customer_ids}
+        for (
+            customer_id,
+            *restaurant_totals,
+        ) in await crud.get_customer_restaurant_totals(
+            db, customer_ids[0], customer_ids[-1]
+        ):
+            totals[customer_id].append(restaurant_totals)
+        for customer_id in customer_ids:
+            yield customer_id, _customer_analytics(totals[customer_id])
+        last_id = customer_ids[-1]
+        # Restaurants loaded for this chunk aren't needed by the next one
+        db.expunge_all()
+
+
+def restaurant_time_bucket_rebuild_statements(restaurant_id: Optional[int] = None):
+    """
+    Builds the statements that recompute the time buckets (restaurant
+    daily/hourly stats and per-item daily quantities) from the orders
+    tables: the DELETEs followed by the INSERT ... SELECTs. Covers every
+    restaurant unless a restaurant_id is given.
+    """
+    order = models.Order
+    day = func.date(order.order_date)
+    hour = cast(func.strftime("%H", order.order_date), Integer)
+    delivered = order.order_status == models.OrderStatus.delivered
+    counters = [
+        func.count(order.id),
+        func.count(case((delivered, 1))),
+        func.count(case((order.order_status == models.OrderStatus.cancelled, 1))),
+        func.coalesce(func.sum(case((delivered, order.total_amount))), 0.0),
+    ]
+    counter_names = [
+        "total_orders",
+        "delivered_orders",
+        "cancelled_orders",
+        "delivered_revenue",
+    ]
+
+    statements = []
+    inserts = []
+    for model, key_columns in (
+        (models.RestaurantDailyStats, [day]),
+        (models.RestaurantHourlyStats, [day, hour]),
+    ):
+        table = model.__table__
+        clear = delete(table)
+        per_bucket = select(order.restaurant_id, *key_columns, *counters).group_by(
+            order.restaurant_id, *key_columns
+        )
+        if restaurant_id is not None:
+            clear = clear.where(table.c.restaurant_id == restaurant_id)
+            per_bucket = per_bucket.where(order.restaurant_id == restaurant_id)
+        statements.append(clear)
+        key_names = ["restaurant_id", "day", "hour"][: 1 + len(key_columns)]
+        inserts.append(insert(table).from_select(key_names + counter_names, per_bucket))
+
+    item_table = models.RestaurantItemDailyStats.__table__
+    item_clear = delete(item_table)
+    per_item_day = (
+        select(
+            models.OrderItem.menu_item_id,
+            day,
+            order.restaurant_id,
+            func.sum(models.OrderItem.quantity),
+        )
+        .join(order, order.id == models.OrderItem.order_id)
+        .group_by(models.OrderItem.menu_item_id, day, order.restaurant_id)
+    )
+    if restaurant_id is not None:
+        item_clear = item_clear.where(item_table.c.restaurant_id == restaurant_id)
+        per_item_day = per_item_day.where(order.restaurant_id == restaurant_id)
+    statements.append(item_clear)
+    inserts.append(
+        insert(item_table).from_select(
+            ["menu_item_id", "day", "restaurant_id", "quantity_sold"], per_item_day
+        )
+    )
+    return statements + inserts
+
+
+def restaurant_stats_rebuild_statements(restaurant_id: Optional[int] = None):
+    """
+    Builds the statements that recompute the analytics rollups
+    (restaurant_stats, restaurant_item_stats and the time buckets) from the
+    orders tables, in execution order: each table is cleared before it is
+    refilled with an INSERT ... SELECT. Covers every restaurant unless a
+    restaurant_id is given.
+    """
+    stats_table = models.RestaurantStats.__table__
+    item_stats_table = models.RestaurantItemStats.__table__
+
+    stats_delete = delete(stats_table)
+    item_stats_delete = delete(item_stats_table)
+    restaurants = select(models.Restaurant.id)
+    order_items = (
+        select(
+            models.OrderItem.menu_item_id,
+            models.Order.restaurant_id,
+            func.sum(models.OrderItem.quantity),
+        )
+        .join(models.Order, models.Order.id == models.OrderItem.order_id)
+        .group_by(models.OrderItem.menu_item_id, models.Order.restaurant_id)
+    )
+    if restaurant_id is not None:
+        stats_delete = stats_delete.where(stats_table.c.restaurant_id == restaurant_id)
+        item_stats_delete = item_stats_delete.where(
+            item_stats_table.c.restaurant_id == restaurant_id
+        )
+        restaurants = restaurants.where(models.Restaurant.id == restaurant_id)
+        order_items = order_items.where(models.Order.restaurant_id == restaurant_id)
+
+    status_counts = [
+        func.count(case((models.Order.order_status == status, 1))).label(
+            models.RestaurantStats.status_column(status).key
+        )
+        for status in models.OrderStatus
+    ]
+    delivered_revenue = func.coalesce(
+        func.sum(
+            case(
+                (
+                    models.Order.order_status == models.OrderStatus.delivered,
+                    models.Order.total_amount,
+                )
+            )
+        ),
+        0.0,
+    ).label("delivered_revenue")
+    per_restaurant = (
+        select(
+            models.Restaurant.id,
+            delivered_revenue,
+            func.count(models.Order.id).label("total_orders"),
+            *status_counts,
+        )
+        .outerjoin(models.Order, models.Order.restaurant_id == models.Restaurant.id)
+        .where(models.Restaurant.id.in_(restaurants))
+        .group_by(models.Restaurant.id)
+    )
+
+    return [
+        stats_delete,
+        item_stats_delete,
+        insert(stats_table).from_select(
+            ["restaurant_id", "delivered_revenue", "total_orders"]
+            + [column.name for column in status_counts],
+            per_restaurant,
+        ),
+        insert(item_stats_table).from_select(
+            ["menu_item_id", "restaurant_id", "quantity_sold"], order_items
+        ),
+        *restaurant_time_bucket_rebuild_statements(restaurant_id),
+    ]
+
+
+async def rebuild_restaurant_stats(
+    db: AsyncSession, restaurant_id: Optional[int] = None
+):
+    """
+    Recomputes the analytics rollups from the orders tables, for backfills
+    or to repair drift. Rebuilds every restaurant unless a restaurant_id is
+    given. Returns the number of restaurant stats rows written.
+    """
+    stats_table = models.RestaurantStats.__table__
+    written = 0
+    for stmt in restaurant_stats_rebuild_statements(restaurant_id):
+        result = await db.execute(stmt)
+        if stmt.is_insert and stmt.table is stats_table:
+            written = result.rowcount
+    await db.commit()
+    return written
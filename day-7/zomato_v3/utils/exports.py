@@ -0,0 +1,100 @@
+import csv
+import io
+import json
+from datetime import date, datetime
+from enum import Enum
+from typing import AsyncIterator, Optional
+
+from .. import crud, schemas
+from ..database import AsyncSessionLocal
+
+# Column order of an exported order row (the labels selected by
+# `crud.stream_restaurant_orders`).
+ORDER_EXPORT_FIELDS = (
+    "id",
+    "order_date",
+    "order_status",
+    "customer_id",
+    "customer_name",
+    "total_amount",
+    "item_count",
+    "delivery_address",
+    "special_instructions",
+    "delivery_time",
+)
+
+MEDIA_TYPES = {
+    schemas.ExportFormat.ndjson: "application/x-ndjson",
+    schemas.ExportFormat.csv: "text/csv",
+}
+
+# Rows are encoded into chunks of this many before being handed to the
+# server, rather than one write per row.
+ROWS_PER_CHUNK = 500
+
+
+def _plain(value):
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+async def _ndjson_chunks(rows) -> AsyncIterator[bytes]:
+    lines = []
+    async for row in rows:
+        record = {field: _plain(row[field]) for field in ORDER_EXPORT_FIELDS}
+        lines.append(json.dumps(record, separators=(",", ":")))
+        if len(lines) >= ROWS_PER_CHUNK:
+            yield ("\n".join(lines) + "\n").encode()
+            lines = []
+    if lines:
+        yield ("\n".join(lines) + "\n").encode()
+
+
+async def _csv_chunks(rows) -> AsyncIterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(ORDER_EXPORT_FIELDS)
+    pending = 0
+    async for row in rows:
+        writer.writerow([_plain(row[field]) for field in ORDER_EXPORT_FIELDS])
+        pending += 1
+        if pending >= ROWS_PER_CHUNK:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+    yield buffer.getvalue().encode()
+
+
+async def export_restaurant_orders(
+    restaurant_id: int,
+    export_format: schemas.ExportFormat,
+    status: Optional[schemas.OrderStatus] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+) -> AsyncIterator[bytes]:
+    """
+    Streams a restaurant's orders as NDJSON or CSV chunks.
+
+    The export outlives the route function, so it opens its own session and
+    holds it for as long as the response is being written. The route's
+    restaurant lookup uses a function-scoped session that is already closed
+    by then, so an export holds one pooled connection, not two.
+    """
+    async with AsyncSessionLocal() as db:
+        rows = crud.stream_restaurant_orders(
+            db,
+            restaurant_id,
+            status=status,
+            start_date=start_date,
+            end_date=end_date,
+        )
+        if export_format == schemas.ExportFormat.csv:
+            chunks = _csv_chunks(rows)
+        else:
+            chunks = _ndjson_chunks(rows)
+        async for chunk in chunks:
+            yield chunk
@@ -0,0 +1,385 @@
+"""
+Bulk synthetic data for benchmarking (`python -m zomato_v3.manage seed`).
+
+Rows are built in Python from a seeded RNG and written with Core
+`executemany` inserts, one transaction per batch of orders, instead of one
+ORM object and flush per row. Ids are assigned here (continuing from the
+current maximum of each table), so order items and reviews can reference
+their order without a RETURNING round trip, and a seed can be appended to
+an existing database.
+
+Orders are spread over the last `days` days in id order, so ids stay
+chronological like rows placed through the API ("recent" listings sort by
+id). Restaurants, customers and menu items are picked from Zipf-like
+distributions: a few hot restaurants and dishes take most of the orders,
+and a core of repeat customers places most of them. The per-row rollups
+(ratings, analytics, time buckets) are not maintained during the load;
+they are rebuilt from the tables once at the end.
+"""
+
+import random
+from datetime import datetime, timedelta, timezone
+from itertools import accumulate
+from typing import Callable, Optional
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from .. import models
+from ..database import AsyncSessionLocal
+from . import business_logic
+
+CUISINES = [
+    "North Indian",
+    "South Indian",
+    "Chinese",
+    "Italian",
+    "Mexican",
+    "Thai",
+    "Mughlai",
+    "Bengali",
+    "Continental",
+    "Street Food",
+]
+CITIES = ["Bengaluru", "Mumbai", "Delhi", "Hyderabad", "Chennai", "Pune", "Kolkata"]
+DISHES = [
+    "Biryani",
+    "Paneer Tikka",
+    "Masala Dosa",
+    "Butter Chicken",
+    "Hakka Noodles",
+    "Margherita Pizza",
+    "Burrito Bowl",
+    "Pad Thai",
+    "Chole Bhature",
+    "Fish Curry",
+    "Veg Thali",
+    "Gulab Jamun",
+]
+QUANTITIES = (1, 2, 3, 4)
+QUANTITY_WEIGHTS = (70, 20, 7, 3)
+# Orders placed within this long of "now" are still in progress
+IN_PROGRESS_WINDOW = timedelta(hours=3)
+# Reviews are written this long after the order was placed, which keeps
+# review ids in created_at order too
+REVIEW_DELAY = timedelta(hours=2)
+CANCEL_RATE = 0.06
+
+
+def _address(customer_id: int) -> str:
+    return f"{customer_id} Main Road, {CITIES[customer_id % len(CITIES)]}"
+
+
+def zipf_cum_weights(n: int, skew: float):
+    """Cumulative weights where rank r is picked in proportion to 1 / r**skew."""
+    return list(accumulate(1 / (rank**skew) for rank in range(1, n + 1)))
+
+
+async def _next_id(conn, model) -> int:
+    current = (await conn.execute(select(func.max(model.id)))).scalar()
+    return (current or 0) + 1
+
+
+def _finished_status(rng: random.Random):
+    """(status, previous_status, version) for an order that is over."""
+    if rng.random() < CANCEL_RATE:
+        return models.OrderStatus.cancelled, models.OrderStatus.placed, 2
+    flow = models.ORDER_STATUS_FLOW
+    return flow[-1], flow[-2], len(flow)
+
+
+def _in_progress_status(rng: random.Random):
+    flow = models.ORDER_STATUS_FLOW
+    step = rng.randrange(len(flow) - 1)
+    return flow[step], flow[step - 1] if step else None, step + 1
+
+
+class _OrderGenerator:
+    """
+    Builds order, order item and review rows batch by batch. Random draws
+    that don't depend on earlier ones (restaurant, customer, item count,
+    dishes, quantities) are made once per batch rather than per row.
+    """
+
+    def __init__(
+        self,
+        rng: random.Random,
+        *,
+        start: datetime,
+        now: datetime,
+        orders: int,
+        restaurant_base: int,
+        customer_base: int,
+        customers: int,
+        menus,
+        quality,
+        first_ids,
+        max_items_per_order: int,
+        review_rate: float,
+        restaurant_skew: float,
+        customer_skew: float,
+        item_skew: float,
+    ):
+        self.rng = rng
+        self.start = start
+        self.now = now
+        self.seconds_per_order = (now - start).total_seconds() / orders
+        self.restaurant_base = restaurant_base
+        self.customer_base = customer_base
+        self.menus = menus
+        self.quality = quality
+        self.order_id, self.order_item_id, self.review_id = first_ids
+        self.review_rate = review_rate
+        # Rank -> index permutations, so the hot restaurants and customers
+        # aren't simply the lowest ids
+        self.restaurant_ranks = list(range(len(menus)))
+        rng.shuffle(self.restaurant_ranks)
+        self.customer_ranks = list(range(customers))
+        rng.shuffle(self.customer_ranks)
+        self.restaurant_weights = zipf_cum_weights(len(menus), restaurant_skew)
+        self.customer_weights = zipf_cum_weights(customers, customer_skew)
+        menu_items = len(menus[0])
+        self.item_positions = range(menu_items)
+        self.item_weights = zipf_cum_weights(menu_items, item_skew)
+        self.item_counts = range(1, min(max_items_per_order, menu_items) + 1)
+        # Fewer items per order is more likely: weights n, n-1, ..., 1
+        self.item_count_weights = list(reversed(self.item_counts))
+
+    def build(self, offset: int, size: int):
+        """Rows for orders `offset` .. `offset + size` of the whole run."""
+        rng = self.rng
+        restaurant_picks = rng.choices(
+            self.restaurant_ranks, cum_weights=self.restaurant_weights, k=size
+        )
+        customer_picks = rng.choices(
+            self.customer_ranks, cum_weights=self.customer_weights, k=size
+        )
+        item_counts = rng.choices(self.item_counts, self.item_count_weights, k=size)
+        total_items = sum(item_counts)
+        positions = rng.choices(
+            self.item_positions, cum_weights=self.item_weights, k=total_items
+        )
+        quantities = rng.choices(QUANTITIES, QUANTITY_WEIGHTS, k=total_items)
+
+        order_rows, order_item_rows, review_rows = [], [], []
+        item_cursor = 0
+        for n in range(size):
+            r = restaurant_picks[n]
+            order_id = self.order_id
+            restaurant_id = self.restaurant_base + r
+            customer_id = self.customer_base + customer_picks[n]
+            placed_at = self.start + timedelta(
+                seconds=int((offset + n + rng.random()) * self.seconds_per_order)
+            )
+            if self.now - placed_at < IN_PROGRESS_WINDOW:
+                status, previous_status, version = _in_progress_status(rng)
+            else:
+                status, previous_status, version = _finished_status(rng)
+
+            menu = self.menus[r]
+            seen = set()
+            total_amount = 0.0
+            next_cursor = item_cursor + item_counts[n]
+            for position, quantity in zip(
+                positions[item_cursor:next_cursor],
+                quantities[item_cursor:next_cursor],
+            ):
+                if position in seen:
+                    continue
+                seen.add(position)
+                menu_item_id, price = menu[position]
+                total_amount += price * quantity
+                order_item_rows.append(
+                    {
+                        "id": self.order_item_id,
+                        "order_id": order_id,
+                        "menu_item_id": menu_item_id,
+                        "quantity": quantity,
+                        "item_price": price,
+                    }
+                )
+                self.order_item_id += 1
+            item_cursor = next_cursor
+
+            delivered = status == models.OrderStatus.delivered
+            if delivered and rng.random() < self.review_rate:
+                rating = round(rng.gauss(self.quality[r], 0.9))
+                review_rows.append(
+                    {
+                        "id": self.review_id,
+                        "customer_id": customer_id,
+                        "restaurant_id": restaurant_id,
+                        "order_id": order_id,
+                        "rating": min(max(rating, 1), 5),
+                        "comment": None,
+                        "created_at": placed_at + REVIEW_DELAY,
+                    }
+                )
+                self.review_id += 1
+                version += 1  # Reviews bump the order's version
+            order_rows.append(
+                {
+                    "id": order_id,
+                    "customer_id": customer_id,
+                    "restaurant_id": restaurant_id,
+                    "order_status": status,
+                    "previous_status": previous_status,
+                    "total_amount": round(total_amount, 2),
+                    "delivery_address": _address(customer_id),
+                    "order_date": placed_at,
+                    "delivery_time": (
+                        placed_at + timedelta(minutes=rng.randint(20, 60))
+                        if delivered
+                        else None
+                    ),
+                    "version": version,
+                }
+            )
+            self.order_id += 1
+        return order_rows, order_item_rows, review_rows
+
+
+async def seed_database(
+    engine: AsyncEngine,
+    restaurants: int = 100,
+    menu_items: int = 25,
+    customers: int = 10_000,
+    orders: int = 100_000,
+    max_items_per_order: int = 5,
+    review_rate: float = 0.3,
+    days: int = 365,
+    restaurant_skew: float = 1.1,
+    customer_skew: float = 0.8,
+    item_skew: float = 1.0,
+    seed: int = 42,
+    batch_size: int = 20_000,
+    now: Optional[datetime] = None,
+    progress: Optional[Callable[[str, int, int], None]] = None,
+) -> dict:
+    """
+    Inserts the given numbers of restaurants (each with `menu_items` dishes),
+    customers and orders, plus their order items and reviews, then rebuilds
+    the rating and analytics rollups. `progress(table, done, total)` is
+    called after each committed batch. Returns the number of rows inserted
+    per table.
+    """
+    rng = random.Random(seed)
+    now = (now or datetime.now(timezone.utc)).replace(tzinfo=None, microsecond=0)
+    start = now - timedelta(days=days)
+    restaurant_table = models.Restaurant.__table__
+    menu_item_table = models.MenuItem.__table__
+    customer_table = models.Customer.__table__
+    order_table = models.Order.__table__
+    order_item_table = models.OrderItem.__table__
+    review_table = models.Review.__table__
+    counts = dict.fromkeys(
+        ["restaurants", "menu_items", "customers", "orders", "order_items", "reviews"],
+        0,
+    )
+
+    async with engine.begin() as conn:
+        restaurant_base = await _next_id(conn, models.Restaurant)
+        menu_item_base = await _next_id(conn, models.MenuItem)
+        customer_base = await _next_id(conn, models.Customer)
+        order_id = await _next_id(conn, models.Order)
+        order_item_id = await _next_id(conn, models.OrderItem)
+        review_id = await _next_id(conn, models.Review)
+
+        restaurant_rows, menu_item_rows, menus, quality = [], [], [], []
+        for r in range(restaurants):
+            restaurant_id = restaurant_base + r
+            cuisine = rng.choice(CUISINES)
+            restaurant_rows.append(
+                {
+                    "id": restaurant_id,
+                    "name": f"{rng.choice(DISHES)} House {restaurant_id}",
+                    "location": rng.choice(CITIES),
+                    "cuisine": cuisine,
+                    "created_at": start,
+                }
+            )
+            menu = []
+            for i in range(menu_items):
+                item_id = menu_item_base + r * menu_items + i
+                price = float(rng.randrange(60, 800, 10))
+                menu_item_rows.append(
+                    {
+                        "id": item_id,
+                        "restaurant_id": restaurant_id,
+                        "name": f"{rng.choice(DISHES)} {i + 1}",
+                        "description": f"{cuisine} special",
+                        "price": price,
+                        "is_available": True,
+                    }
+                )
+                menu.append((item_id, price))
+            menus.append(menu)
+            quality.append(rng.uniform(2.5, 4.8))
+        if restaurant_rows:
+            await conn.execute(insert(restaurant_table), restaurant_rows)
+            await conn.execute(insert(menu_item_table), menu_item_rows)
+    counts["restaurants"] = len(restaurant_rows)
+    counts["menu_items"] = len(menu_item_rows)
+    if progress:
+        progress("restaurants", restaurants, restaurants)
+
+    for offset in range(0, customers, batch_size):
+        rows = [
+            {
+                "id": customer_id,
+                "name": f"Customer {customer_id}",
+                "email": f"customer{customer_id}@seed.example.com",
+                "phone_number": f"+91 {customer_id:010d}",
+                "address": _address(customer_id),
+                "is_active": True,
+                "created_at": start,
+            }
+            for customer_id in range(
+                customer_base + offset,
+                customer_base + min(offset + batch_size, customers),
+            )
+        ]
+        async with engine.begin() as conn:
+            await conn.execute(insert(customer_table), rows)
+        counts["customers"] += len(rows)
+        if progress:
+            progress("customers", counts["customers"], customers)
+
+    if orders and restaurants and menu_items and customers:
+        generator = _OrderGenerator(
+            rng,
+            start=start,
+            now=now,
+            orders=orders,
+            restaurant_base=restaurant_base,
+            customer_base=customer_base,
+            customers=customers,
+            menus=menus,
+            quality=quality,
+            first_ids=(order_id, order_item_id, review_id),
+            max_items_per_order=max_items_per_order,
+            review_rate=review_rate,
+            restaurant_skew=restaurant_skew,
+            customer_skew=customer_skew,
+            item_skew=item_skew,
+        )
+
+        for offset in range(0, orders, batch_size):
+            order_rows, order_item_rows, review_rows = generator.build(
+                offset, min(batch_size, orders - offset)
+            )
+            async with engine.begin() as conn:
+                await conn.execute(insert(order_table), order_rows)
+                await conn.execute(insert(order_item_table), order_item_rows)
+                if review_rows:
+                    await conn.execute(insert(review_table), review_rows)
+            counts["orders"] += len(order_rows)
+            counts["order_items"] += len(order_item_rows)
+            counts["reviews"] += len(review_rows)
+            if progress:
+                progress("orders", counts["orders"], orders)
+
+    async with AsyncSessionLocal() as db:
+        await business_logic.rebuild_restaurant_ratings(db)
+        await business_logic.rebuild_restaurant_stats(db)
+    return counts